@@ -0,0 +1,211 @@
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from aws_cdk import (
+    aws_autoscaling as autoscaling,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda,
+    aws_ssm as ssm,
+    Duration,
+    Stack,
+)
+
+"""
+Fast scale-out of the EC2 capacity behind the ECS cluster.
+Instances are pre-initialized in an ASG warm pool and pull the Flow images while being prepared, so that a scaled out
+instance joins the cluster with a warm image cache.
+The images are read from an SSM parameter on every boot instead of being written into the user data. Changing an image
+only updates the parameter, not the launch configuration, and a `STOPPED` warm pool instance pulls the current images
+when it boots into service. Instances of a `RUNNING` warm pool do not reboot and keep the images of their first boot.
+"""
+
+METRIC_NAMESPACE = 'JinaAWS'
+# time from boot until the images of an instance are pulled, for warm pool instances this is the warm-up time
+PREPARE_METRIC_NAME = 'InstancePrepareSeconds'
+# time an instance needs to move into service, from a launch or from the warm pool, by `Origin`
+SCALE_OUT_METRIC_NAME = 'ScaleOutSeconds'
+
+# also matched by bash in the pull script, so it only uses POSIX extended regular expressions
+ECR_REGISTRY = re.compile(r'^[0-9]{12}\.dkr\.ecr\.([a-z0-9-]+)\.amazonaws\.com(\.cn)?$')
+
+# pulls the images of the SSM parameter, installed as a per-boot script of cloud-init
+PULL_SCRIPT = '/var/lib/cloud/scripts/per-boot/jina-pull-images.sh'
+
+IMDS_REGION = ('$(curl -s http://169.254.169.254/latest/meta-data/placement/region '
+               '-H "X-aws-ec2-metadata-token: $(curl -s -X PUT http://169.254.169.254/latest/api/token '
+               '-H \'X-aws-ec2-metadata-token-ttl-seconds: 60\')")')
+
+
+@dataclass
+class JinaWarmPoolConfig:
+    # number of instances that are always kept in the warm pool
+    min_size: int = 1
+    # maximum instances in the warm pool and the group together, defaults to the max capacity of the group
+    max_group_prepared_capacity: Optional[int] = None
+    # `STOPPED` or `RUNNING`, `HIBERNATED` needs an encrypted root volume the default ASG does not have
+    pool_state: autoscaling.PoolState = autoscaling.PoolState.STOPPED
+    # return instances to the warm pool on scale in instead of terminating them
+    reuse_on_scale_in: bool = True
+    # start tasks from the pre-pulled images without checking the registry, only safe if every image of the Flow
+    # uses an immutable or digest pinned tag, otherwise a re-pushed tag keeps running the stale image
+    prefer_cached_images: bool = False
+
+    def validate(self) -> None:
+        """Check the warm pool against what the default auto scaling group of the stacks supports."""
+        if self.pool_state == autoscaling.PoolState.HIBERNATED:
+            raise ValueError('a `HIBERNATED` warm pool needs an encrypted root volume and hibernation enabled on the '
+                             'launch template, use `STOPPED` or `RUNNING`')
+        if self.min_size < 0:
+            raise ValueError(f'`min_size` of the warm pool must not be negative, got {self.min_size}')
+        if self.max_group_prepared_capacity is not None and self.max_group_prepared_capacity < self.min_size:
+            raise ValueError('`max_group_prepared_capacity` of the warm pool must be at least `min_size`')
+
+
+def registry_images(uses: Iterable[Optional[str]]) -> List[str]:
+    """Return the docker images that can be pulled from the `uses` of the Jina nodes, in order and without duplicates."""
+    images = []
+    for image in uses:
+        if not image:
+            continue
+        if image.startswith('docker://'):
+            image = image[len('docker://'):]
+        elif '://' in image:
+            # Executor Hub and local sources are not pullable by the docker daemon
+            continue
+        if image not in images:
+            images.append(image)
+    return images
+
+
+def ecr_registries(images: Iterable[str]) -> List[str]:
+    """Return the ECR registries of `images`, which need a `docker login` before pulling."""
+    registries = []
+    for image in images:
+        registry = image.split('/', 1)[0]
+        if ECR_REGISTRY.match(registry) and registry not in registries:
+            registries.append(registry)
+    return registries
+
+
+def pull_user_data(images_parameter_name: str, stack_name: str) -> List[str]:
+    """
+    User data installing a per-boot script that pulls the space separated images of the SSM parameter
+    `images_parameter_name`, logging in to their ECR registries first, and running it on the first boot. The prepare
+    time of the instance is only published when every image was pulled.
+    """
+    return [
+        'yum install -y awscli',
+        f'mkdir -p {os.path.dirname(PULL_SCRIPT)}',
+        f"cat > {PULL_SCRIPT} <<'EOF'",
+        '#!/bin/bash',
+        f'REGION={IMDS_REGION}',
+        f'IMAGES=$(aws ssm get-parameter --name {images_parameter_name} --region $REGION '
+        f'--query Parameter.Value --output text) || exit 1',
+        'PULL_FAILED=0',
+        'for IMAGE in $IMAGES; do',
+        '  REGISTRY=${IMAGE%%/*}',
+        f"  if [[ $REGISTRY =~ {ECR_REGISTRY.pattern} ]]; then",
+        '    aws ecr get-login-password --region ${BASH_REMATCH[1]} | '
+        'docker login --username AWS --password-stdin $REGISTRY || PULL_FAILED=1',
+        '  fi',
+        '  docker pull $IMAGE || PULL_FAILED=1',
+        'done',
+        'exit $PULL_FAILED',
+        'EOF',
+        f'chmod +x {PULL_SCRIPT}',
+        f'if {PULL_SCRIPT}; then '
+        f'aws cloudwatch put-metric-data --namespace {METRIC_NAMESPACE} --metric-name {PREPARE_METRIC_NAME} '
+        f'--unit Seconds --value $(cut -d " " -f1 /proc/uptime) --dimensions StackName={stack_name} '
+        f'--region {IMDS_REGION}; fi',
+    ]
+
+
+def configure_fast_scale_out(asg: autoscaling.AutoScalingGroup,
+                             images: List[str],
+                             warm_pool: Optional[JinaWarmPoolConfig] = None,
+                             ) -> None:
+    """
+    Pre-pull the `images` on every instance of `asg`, publish the prepare and scale-out times of the instances and
+    optionally attach a warm pool to the group.
+
+    :param asg: the auto scaling group providing the capacity of the ECS cluster
+    :param images: docker images to pull while the instance is initialized
+    :param warm_pool: the warm pool configuration, no warm pool is created if not given
+    """
+    if warm_pool:
+        warm_pool.validate()
+
+    stack = Stack.of(asg)
+    # keep warm pool instances from registering to the cluster before they are in service
+    asg.add_user_data('echo ECS_WARM_POOLS_CHECK=true >> /etc/ecs/ecs.config')
+    if warm_pool and warm_pool.prefer_cached_images:
+        asg.add_user_data('echo ECS_IMAGE_PULL_BEHAVIOR=prefer-cached >> /etc/ecs/ecs.config')
+    if images:
+        images_parameter = ssm.StringParameter(
+            stack,
+            'PrePullImages',
+            description='docker images pulled by the instances of the ECS cluster on boot',
+            string_value=' '.join(images),
+        )
+        images_parameter.grant_read(asg)
+        asg.add_user_data(*pull_user_data(images_parameter.parameter_name, stack.stack_name))
+
+    asg.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=['cloudwatch:PutMetricData'],
+            resources=['*'],
+            conditions={'StringEquals': {'cloudwatch:namespace': METRIC_NAMESPACE}},
+        )
+    )
+    if ecr_registries(images):
+        asg.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=['ecr:GetAuthorizationToken', 'ecr:BatchGetImage', 'ecr:GetDownloadUrlForLayer'],
+                resources=['*'],
+            )
+        )
+
+    # the launch events of the group carry the start and end time of moving an instance into service
+    scale_out_metric_fn = aws_lambda.Function(
+        stack,
+        'ScaleOutMetric',
+        code=aws_lambda.Code.from_asset(os.path.join(Path(__file__).absolute().parent, 'lambda_src')),
+        handler='scale_out_metric.handler',
+        timeout=Duration.seconds(10),
+        runtime=aws_lambda.Runtime.PYTHON_3_10,
+        environment={
+            'METRIC_NAMESPACE': METRIC_NAMESPACE,
+            'METRIC_NAME': SCALE_OUT_METRIC_NAME,
+            'STACK_NAME': stack.stack_name,
+        },
+    )
+    scale_out_metric_fn.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=['cloudwatch:PutMetricData'],
+            resources=['*'],
+            conditions={'StringEquals': {'cloudwatch:namespace': METRIC_NAMESPACE}},
+        )
+    )
+    events.Rule(
+        stack,
+        'ScaleOutMetricRule',
+        event_pattern=events.EventPattern(
+            source=['aws.autoscaling'],
+            detail_type=['EC2 Instance Launch Successful'],
+            detail={'AutoScalingGroupName': [asg.auto_scaling_group_name]},
+        ),
+        targets=[targets.LambdaFunction(scale_out_metric_fn)],
+    )
+
+    if warm_pool:
+        asg.add_warm_pool(
+            min_size=warm_pool.min_size,
+            max_group_prepared_capacity=warm_pool.max_group_prepared_capacity,
+            pool_state=warm_pool.pool_state,
+            reuse_on_scale_in=warm_pool.reuse_on_scale_in,
+        )
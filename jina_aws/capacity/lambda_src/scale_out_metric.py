@@ -0,0 +1,42 @@
+import os
+from datetime import datetime
+
+import boto3
+
+cloudwatch = boto3.client("cloudwatch")
+
+METRIC_NAMESPACE = os.environ.get("METRIC_NAMESPACE", "JinaAWS")
+METRIC_NAME = os.environ.get("METRIC_NAME", "ScaleOutSeconds")
+STACK_NAME = os.environ.get("STACK_NAME", "")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def handler(event, context):
+    """
+    Publish the time an instance needed to move into service from an `EC2 Instance Launch Successful` event.
+    `Origin` is `EC2` for a new instance and `WarmPool` for a pre-initialized one, launches into the warm pool are
+    not a scale-out and are ignored.
+    """
+    detail = event["detail"]
+    if detail.get("Destination", "AutoScalingGroup") != "AutoScalingGroup":
+        return None
+    seconds = (_parse_time(detail["EndTime"]) - _parse_time(detail["StartTime"])).total_seconds()
+    print(f"{detail.get('EC2InstanceId')} from {detail.get('Origin', 'EC2')} in service after {seconds} seconds")
+    cloudwatch.put_metric_data(
+        Namespace=METRIC_NAMESPACE,
+        MetricData=[
+            {
+                "MetricName": METRIC_NAME,
+                "Dimensions": [
+                    {"Name": "StackName", "Value": STACK_NAME},
+                    {"Name": "Origin", "Value": detail.get("Origin", "EC2")},
+                ],
+                "Value": seconds,
+                "Unit": "Seconds",
+            }
+        ],
+    )
+    return seconds
@@ -1,4 +1,5 @@
 import copy
+from typing import Optional
 
 from aws_cdk import (
     aws_ec2 as ec2,
@@ -6,17 +7,22 @@ from aws_cdk import (
     aws_iam as iam,
     Stack,
     CfnOutput,
+    Duration,
     aws_autoscaling as autoscaling,
-    aws_ecs_patterns as ecs_patterns,
 )
 from constructs import Construct
 from jina import Deployment as JinaDeployment
 from jina.helper import ArgNamespace
-from jina.parsers import set_gateway_parser
+from jina.parsers import set_deployment_parser
 from jina.serve.networking import GrpcConnectionPool
 
+from jina_aws.capacity import JinaWarmPoolConfig, configure_fast_scale_out, registry_images
+from jina_aws.launch import JinaLaunchConfig, load_balanced_service, task_definition
+from jina_aws.performance import JinaPerformanceConfig
+from jina_aws.rollout import JinaRolloutConfig, container_health_check, pin_ports, service_kwargs, tune_target_group
+
 """
-The Jina custom Gateway from a Jina Deployment is mapped to a ECS Container running on EC2 instances.
+The Jina custom Gateway from a Jina Deployment is mapped to a ECS Container running on EC2 instances or Fargate.
 """
 
 
@@ -26,10 +32,18 @@ class JinaDeploymentStack(Stack):
                  id: str,
                  jina_deployment: JinaDeployment,
                  cluster_name: str = 'MyCluster',
+                 performance: Optional[JinaPerformanceConfig] = None,
+                 warm_pool: Optional[JinaWarmPoolConfig] = None,
+                 rollout: Optional[JinaRolloutConfig] = None,
+                 launch: Optional[JinaLaunchConfig] = None,
                  **kwargs
                  ) -> None:
         super().__init__(scope, id, **kwargs)
 
+        rollout = rollout or JinaRolloutConfig()
+        launch = launch or JinaLaunchConfig()
+        launch.validate(jina_deployment.args.name, has_volumes=bool(jina_deployment.args.volumes))
+
         # Create a VPC
         self.vpc_name = f'{cluster_name}_vpc'
         vpc = ec2.Vpc(
@@ -45,6 +59,7 @@ class JinaDeploymentStack(Stack):
             self,
             cluster_name,
             vpc=vpc,
+            enable_fargate_capacity_providers=launch.spot,
         )
 
         asg = autoscaling.AutoScalingGroup(
@@ -54,7 +69,11 @@ class JinaDeploymentStack(Stack):
             vpc=vpc,
             min_capacity=1,
             max_capacity=jina_deployment.args.replicas,
+            group_metrics=[autoscaling.GroupMetrics.all()],
         )
+        # a Fargate Executor does not run on the instances of the auto scaling group
+        images = [] if launch.is_fargate else registry_images([jina_deployment.args.uses])
+        configure_fast_scale_out(asg, images, warm_pool)
         capacity_provider = ecs.AsgCapacityProvider(self, 'AsgCapacityProvider',
                                                     auto_scaling_group=asg
                                                     )
@@ -76,9 +95,10 @@ class JinaDeploymentStack(Stack):
         )
 
         # Create a task definition
-        task_definition = ecs.Ec2TaskDefinition(
+        deployment_task_definition = task_definition(
             self,
             'MyTaskDefinition',
+            launch,
             task_role=task_execution_role,
         )
 
@@ -92,36 +112,46 @@ class JinaDeploymentStack(Stack):
             'workspace_id',
             'noblock_on_start',
             'env',
+            # only used as desired count of the service, a scaling change must not replace the task definition
+            'replicas',
         }
         cargs = copy.copy(jina_deployment.args)
+        pin_ports(cargs)
+        parser = set_deployment_parser()
         non_defaults = ArgNamespace.get_non_defaults_args(
-            cargs, set_gateway_parser(), taboo=taboo
+            cargs, parser, taboo=taboo
         )
+        environment = cargs.env
+        if performance:
+            environment = performance.apply(jina_deployment.args.name, parser, non_defaults, environment)
         _args = ArgNamespace.kwargs2list(non_defaults)
-        container_definition = task_definition.add_container(
+        container_definition = deployment_task_definition.add_container(
             jina_deployment.args.name,
             image=ecs.ContainerImage.from_registry(jina_deployment.args.uses),
-            memory_limit_mib=512,
+            memory_limit_mib=launch.memory_limit_mib,
             cpu=1,
             port_mappings=[
-                {'containerPort': GrpcConnectionPool.K8S_PORT, 'hostPort': GrpcConnectionPool.K8S_PORT},
-                {'containerPort': jina_deployment.args.port_monitoring,
-                 'hostPort': jina_deployment.args.port_monitoring}
+                {'containerPort': GrpcConnectionPool.K8S_PORT},
+                {'containerPort': cargs.port_monitoring}
             ],
             command=['jina'],
             entry_point=['executor'] + _args,
-            environment=cargs.env,
+            environment=environment,
+            health_check=container_health_check('executor', rollout, cargs.protocol),
+            stop_timeout=Duration.seconds(rollout.stop_timeout_seconds),
 
         )
 
-        ecs_service = ecs_patterns.NetworkLoadBalancedEc2Service(
-            self, 'Ec2Service',
+        ecs_service = load_balanced_service(
+            self, 'FargateService' if launch.is_fargate else 'Ec2Service',
+            launch,
             cluster=cluster,
-            memory_limit_mib=512,
-            task_definition=task_definition,
+            task_definition=deployment_task_definition,
             desired_count=jina_deployment.args.replicas,
             service_name='executor',
+            **service_kwargs(rollout),
         )
+        tune_target_group(ecs_service, rollout)
 
         if jina_deployment.args.volumes:
             # Create an EBS volume
@@ -1,4 +1,5 @@
 import copy
+from typing import Dict, Optional
 
 from aws_cdk import (
     aws_ec2 as ec2,
@@ -6,8 +7,8 @@ from aws_cdk import (
     aws_iam as iam,
     Stack,
     CfnOutput,
+    Duration,
     aws_autoscaling as autoscaling,
-    aws_ecs_patterns as ecs_patterns,
 )
 from constructs import Construct
 from jina import Flow as JinaFlow
@@ -15,10 +16,26 @@ from jina.helper import ArgNamespace
 from jina.parsers import set_deployment_parser, set_gateway_parser
 from jina.serve.networking import GrpcConnectionPool
 
+from jina_aws.capacity import JinaWarmPoolConfig, configure_fast_scale_out, registry_images
+from jina_aws.launch import JinaLaunchConfig, load_balanced_service, task_definition
+from jina_aws.performance import GATEWAY_NODE_NAME, JinaPerformanceConfig, validate_flow_node_configs
+from jina_aws.rollout import (
+    JinaRolloutConfig,
+    container_health_check,
+    pin_ports,
+    service_kwargs,
+    tune_target_group,
+)
+
 """
-The Jina Flow containing the Gateway and Executors are mapped to a ECS Container running on EC2 instances.
+The Jina Flow containing the Gateway and Executors are mapped to a ECS Container running on EC2 instances or Fargate.
 """
 
+# the auto scaling group providing the EC2 capacity of the cluster
+ASG_INSTANCE_TYPE = 't3.medium'
+ASG_MIN_CAPACITY = 1
+ASG_MAX_CAPACITY = 10
+
 
 class JinaFlowStack(Stack):
     def __init__(self,
@@ -26,10 +43,24 @@ class JinaFlowStack(Stack):
                  id: str,
                  jina_flow: JinaFlow,
                  cluster_name: str = 'MyCluster',
+                 performance: Optional[Dict[str, JinaPerformanceConfig]] = None,
+                 warm_pool: Optional[JinaWarmPoolConfig] = None,
+                 rollout: Optional[JinaRolloutConfig] = None,
+                 launch: Optional[Dict[str, JinaLaunchConfig]] = None,
                  **kwargs
                  ) -> None:
         super().__init__(scope, id, **kwargs)
 
+        # per node launch type, keyed by the Flow node name or 'gateway', nodes default to EC2
+        self.launch = launch or {}
+        validate_flow_node_configs(self.launch, jina_flow._deployment_nodes.keys(), kind='launch')
+
+        self.rollout = rollout or JinaRolloutConfig()
+
+        # per node performance tuning, keyed by the Flow node name or 'gateway'
+        self.performance = performance or {}
+        validate_flow_node_configs(self.performance, jina_flow._deployment_nodes.keys())
+
         # Create a VPC
         self.vpc_name = f'{cluster_name}_vpc'
         vpc = ec2.Vpc(
@@ -45,16 +76,25 @@ class JinaFlowStack(Stack):
             self,
             cluster_name,
             vpc=vpc,
+            enable_fargate_capacity_providers=any(config.spot for config in self.launch.values()),
         )
 
         asg = autoscaling.AutoScalingGroup(
             self, 'DefaultAutoScalingGroup',
-            instance_type=ec2.InstanceType('t4.medium'),
+            instance_type=ec2.InstanceType(ASG_INSTANCE_TYPE),
             machine_image=ecs.EcsOptimizedImage.amazon_linux2(),
             vpc=vpc,
-            min_capacity=1,
-            max_capacity=10,
+            min_capacity=ASG_MIN_CAPACITY,
+            max_capacity=ASG_MAX_CAPACITY,
+            group_metrics=[autoscaling.GroupMetrics.all()],
         )
+        # only the images of EC2 nodes run on the instances of the auto scaling group
+        node_uses = {GATEWAY_NODE_NAME: jina_flow.gateway_args.uses}
+        node_uses.update({name: deployment.args.uses for name, deployment in jina_flow._deployment_nodes.items()})
+        flow_images = registry_images([
+            uses for name, uses in node_uses.items() if not self.launch.get(name, JinaLaunchConfig()).is_fargate
+        ])
+        configure_fast_scale_out(asg, flow_images, warm_pool)
         capacity_provider = ecs.AsgCapacityProvider(self, 'AsgCapacityProvider', auto_scaling_group=asg)
         cluster.add_asg_capacity_provider(capacity_provider)
 
@@ -87,10 +127,14 @@ class JinaFlowStack(Stack):
 
     def transform_gateway_to_ecs_service(self, cluster, gateway_args, task_execution_role):
         cargs = copy.copy(gateway_args)
+        pin_ports(cargs)
+        launch = self.launch.get(GATEWAY_NODE_NAME, JinaLaunchConfig())
+        launch.validate(GATEWAY_NODE_NAME, has_volumes=bool(getattr(cargs, 'volumes', None)))
         # Create a task definition
-        task_definition = ecs.Ec2TaskDefinition(
+        gateway_task_definition = task_definition(
             self,
             f'{cargs.name}_TaskDefinition',
+            launch,
             task_role=task_execution_role,
         )
 
@@ -104,35 +148,45 @@ class JinaFlowStack(Stack):
             'workspace_id',
             'noblock_on_start',
             'env',
+            # only used as desired count of the service, a scaling change must not replace the task definition
+            'replicas',
         }
+        parser = set_gateway_parser()
         non_defaults = ArgNamespace.get_non_defaults_args(
-            cargs, set_gateway_parser(), taboo=taboo
+            cargs, parser, taboo=taboo
         )
+        environment = cargs.env
+        if GATEWAY_NODE_NAME in self.performance:
+            environment = self.performance[GATEWAY_NODE_NAME].apply(GATEWAY_NODE_NAME, parser, non_defaults,
+                                                                    environment)
         _args = ArgNamespace.kwargs2list(non_defaults)
-        container_definition = task_definition.add_container(
+        container_definition = gateway_task_definition.add_container(
             cargs.name,
             image=ecs.ContainerImage.from_registry(cargs.uses or ''),
-            memory_limit_mib=512,
+            memory_limit_mib=launch.memory_limit_mib,
             cpu=1,
             port_mappings=[
-                {'containerPort': GrpcConnectionPool.K8S_PORT, 'hostPort': GrpcConnectionPool.K8S_PORT},
-                {'containerPort': cargs.port_monitoring[0],
-                 'hostPort': cargs.port_monitoring[0]}
+                {'containerPort': GrpcConnectionPool.K8S_PORT},
+                {'containerPort': cargs.port_monitoring[0]}
             ],
             command=['jina'],
             entry_point=['gateway'] + _args,
-            environment=cargs.env,
+            environment=environment,
+            health_check=container_health_check('gateway', self.rollout, cargs.protocol),
+            stop_timeout=Duration.seconds(self.rollout.stop_timeout_seconds),
 
         )
 
-        ecs_service = ecs_patterns.NetworkLoadBalancedEc2Service(
-            self, f'{cargs.name}_Ec2Service',
+        ecs_service = load_balanced_service(
+            self, f'{cargs.name}_FargateService' if launch.is_fargate else f'{cargs.name}_Ec2Service',
+            launch,
             cluster=cluster,
-            memory_limit_mib=512,
-            task_definition=task_definition,
+            task_definition=gateway_task_definition,
             desired_count=cargs.replicas,
             service_name=cargs.name,
+            **service_kwargs(self.rollout),
         )
+        tune_target_group(ecs_service, self.rollout)
 
         if 'volumes' in cargs:
             # Create an EBS volume
@@ -158,10 +212,13 @@ class JinaFlowStack(Stack):
         )
 
     def transform_deployments_to_ecs_service(self, cluster, node_name, deployment, task_execution_role):
+        launch = self.launch.get(node_name, JinaLaunchConfig())
+        launch.validate(node_name, has_volumes=bool(deployment.args.volumes))
         # Create a task definition
-        task_definition = ecs.Ec2TaskDefinition(
+        node_task_definition = task_definition(
             self,
             f'{node_name}_TaskDefinition',
+            launch,
             task_role=task_execution_role,
         )
         # Create a container definitions
@@ -174,26 +231,34 @@ class JinaFlowStack(Stack):
             'workspace_id',
             'noblock_on_start',
             'env',
+            # only used as desired count of the service, a scaling change must not replace the task definition
+            'replicas',
         }
         cargs = copy.copy(deployment.args)
+        pin_ports(cargs)
+        parser = set_gateway_parser() if node_name == GATEWAY_NODE_NAME else set_deployment_parser()
         non_defaults = ArgNamespace.get_non_defaults_args(
-            cargs, set_deployment_parser(), taboo=taboo
+            cargs, parser, taboo=taboo
         )
+        environment = cargs.env
+        if node_name in self.performance:
+            environment = self.performance[node_name].apply(node_name, parser, non_defaults, environment)
         _args = ArgNamespace.kwargs2list(non_defaults)
-        entry_point_sub_command = 'gateway' if node_name == 'gateway' else 'executor'
-        container_definition = task_definition.add_container(
+        entry_point_sub_command = 'gateway' if node_name == GATEWAY_NODE_NAME else 'executor'
+        container_definition = node_task_definition.add_container(
             deployment.args.name,
             image=ecs.ContainerImage.from_registry(deployment.args.uses),
-            memory_limit_mib=512,
+            memory_limit_mib=launch.memory_limit_mib,
             cpu=1,
             port_mappings=[
-                {'containerPort': GrpcConnectionPool.K8S_PORT, 'hostPort': GrpcConnectionPool.K8S_PORT},
-                {'containerPort': deployment.args.port_monitoring,
-                 'hostPort': deployment.args.port_monitoring}
+                {'containerPort': GrpcConnectionPool.K8S_PORT},
+                {'containerPort': cargs.port_monitoring}
             ],
             command=['jina'],
             entry_point=[entry_point_sub_command] + _args,
-            environment=cargs.env,
+            environment=environment,
+            health_check=container_health_check(entry_point_sub_command, self.rollout, cargs.protocol),
+            stop_timeout=Duration.seconds(self.rollout.stop_timeout_seconds),
 
         )
         if deployment.args.volumes:
@@ -213,14 +278,16 @@ class JinaFlowStack(Stack):
                     read_only=False,
                 )
             )
-        ecs_service = ecs_patterns.NetworkLoadBalancedEc2Service(
-            self, f'{node_name}_Ec2Service',
+        ecs_service = load_balanced_service(
+            self, f'{node_name}_FargateService' if launch.is_fargate else f'{node_name}_Ec2Service',
+            launch,
             cluster=cluster,
-            memory_limit_mib=512,
-            task_definition=task_definition,
+            task_definition=node_task_definition,
             desired_count=deployment.args.replicas,
             service_name=node_name,
+            **service_kwargs(self.rollout),
         )
+        tune_target_group(ecs_service, self.rollout)
         CfnOutput(
             self, f'{node_name}_LoadBalancerDNS',
             value='http://' + ecs_service.load_balancer.load_balancer_dns_name
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_ecs_patterns as ecs_patterns,
+)
+from constructs import Construct
+from jina.serve.networking import GrpcConnectionPool
+
+"""
+Launch type of the ECS service of a Jina node.
+Heavy Executors run as EC2 tasks on the auto scaling group of the cluster, the Gateway and lightweight Executors can run
+on Fargate (optionally on arm64 or Fargate Spot) and scale out without waiting for an instance.
+"""
+
+EC2 = 'EC2'
+FARGATE = 'FARGATE'
+
+# memory sizes in MiB supported by each Fargate task cpu size
+FARGATE_MEMORY_MIB = {
+    256: (512, 1024, 2048),
+    512: tuple(range(1024, 4096 + 1, 1024)),
+    1024: tuple(range(2048, 8192 + 1, 1024)),
+    2048: tuple(range(4096, 16384 + 1, 1024)),
+    4096: tuple(range(8192, 30720 + 1, 1024)),
+    8192: tuple(range(16384, 61440 + 1, 4096)),
+    16384: tuple(range(32768, 122880 + 1, 8192)),
+}
+
+
+@dataclass
+class JinaLaunchConfig:
+    # `EC2` or `FARGATE`
+    launch_type: str = EC2
+    # task cpu units, only used on Fargate
+    cpu: int = 256
+    memory_limit_mib: int = 512
+    # run on Graviton, the images of the node must be built for arm64
+    arm64: bool = False
+    # run on Fargate Spot, tasks can be interrupted with a two minutes warning
+    spot: bool = False
+
+    @property
+    def is_fargate(self) -> bool:
+        return self.launch_type == FARGATE
+
+    def validate(self, node_name: str, has_volumes: bool = False) -> None:
+        """Check the launch config of the node `node_name` against the Fargate limits."""
+        if self.launch_type not in (EC2, FARGATE):
+            raise ValueError(f'launch type of `{node_name}` must be `{EC2}` or `{FARGATE}`, got `{self.launch_type}`')
+        if not self.is_fargate:
+            if self.arm64 or self.spot:
+                raise ValueError(f'`arm64` and `spot` of `{node_name}` are only supported on `{FARGATE}`')
+            return
+        if self.cpu not in FARGATE_MEMORY_MIB:
+            raise ValueError(f'Fargate cpu of `{node_name}` must be one of {sorted(FARGATE_MEMORY_MIB)}')
+        memory_sizes = FARGATE_MEMORY_MIB[self.cpu]
+        if self.memory_limit_mib not in memory_sizes:
+            step = memory_sizes[1] - memory_sizes[0] if self.cpu > 256 else None
+            allowed = f'{memory_sizes[0]} to {memory_sizes[-1]} MiB in {step} MiB steps' if step else \
+                ', '.join(f'{memory} MiB' for memory in memory_sizes)
+            raise ValueError(f'Fargate memory of `{node_name}` with {self.cpu} cpu must be {allowed}, '
+                             f'got {self.memory_limit_mib}')
+        if self.arm64 and self.spot:
+            raise ValueError(f'Fargate Spot of `{node_name}` is not available for arm64')
+        if has_volumes:
+            raise ValueError(f'EBS volumes of `{node_name}` can not be mounted on Fargate')
+
+
+def task_definition(scope: Construct, construct_id: str, config: JinaLaunchConfig, task_role) -> ecs.TaskDefinition:
+    """Create the task definition of a node, in `awsvpc` network mode on Fargate and `bridge` mode on EC2."""
+    if not config.is_fargate:
+        return ecs.Ec2TaskDefinition(scope, construct_id, task_role=task_role)
+    return ecs.FargateTaskDefinition(
+        scope,
+        construct_id,
+        task_role=task_role,
+        cpu=config.cpu,
+        memory_limit_mib=config.memory_limit_mib,
+        runtime_platform=ecs.RuntimePlatform(
+            cpu_architecture=ecs.CpuArchitecture.ARM64 if config.arm64 else ecs.CpuArchitecture.X86_64,
+            operating_system_family=ecs.OperatingSystemFamily.LINUX,
+        ),
+    )
+
+
+def load_balanced_service(scope: Construct,
+                          construct_id: str,
+                          config: JinaLaunchConfig,
+                          **kwargs: Any,
+                          ) -> ecs_patterns.NetworkLoadBalancedServiceBase:
+    """Create the NLB fronted ECS service of a node for its launch type."""
+    if not config.is_fargate:
+        return ecs_patterns.NetworkLoadBalancedEc2Service(
+            scope, construct_id, memory_limit_mib=config.memory_limit_mib, **kwargs
+        )
+    fargate_kwargs: Dict[str, Any] = {}
+    if config.spot:
+        fargate_kwargs['capacity_provider_strategies'] = [
+            ecs.CapacityProviderStrategy(capacity_provider='FARGATE_SPOT', weight=1),
+        ]
+    service = ecs_patterns.NetworkLoadBalancedFargateService(scope, construct_id, **fargate_kwargs, **kwargs)
+    # the NLB forwards from inside the VPC to the task ENIs, which only accept traffic allowed by the service
+    # security group
+    service.service.connections.allow_from(
+        ec2.Peer.ipv4(service.cluster.vpc.vpc_cidr_block),
+        ec2.Port.tcp(GrpcConnectionPool.K8S_PORT),
+        description='allow incoming traffic from NLB',
+    )
+    return service
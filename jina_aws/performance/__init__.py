@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+"""
+Typed performance tuning of a single Jina node (the Gateway or an Executor).
+The options are rendered into the container command and environment of the ECS/SageMaker containers and
+are validated against the Jina argument parsers when the stack is synthesized.
+"""
+
+GATEWAY_NODE_NAME = 'gateway'
+
+# keys accepted by Jina's `dynamic_batching` configuration of an Executor endpoint
+DYNAMIC_BATCHING_KEYS = {'preferred_batch_size', 'timeout'}
+
+
+@dataclass
+class JinaPerformanceConfig:
+    # Executor: per endpoint dynamic batching, e.g. {'/encode': {'preferred_batch_size': 32, 'timeout': 100}}
+    uses_dynamic_batching: Optional[Dict[str, Dict[str, int]]] = None
+    # Gateway: number of in-flight client requests before backpressure is applied, 0 disables the limit
+    prefetch: Optional[int] = None
+    # timeout in milliseconds for sending a request to the next stage, -1 disables the timeout
+    timeout_send: Optional[int] = None
+    # timeout in milliseconds for the runtime to become ready, -1 waits forever
+    timeout_ready: Optional[int] = None
+    # number of retries per gRPC call, < 0 defaults to max(3, replicas)
+    retries: Optional[int] = None
+    # options for the gRPC channels of the connection pool towards the downstream replicas
+    grpc_channel_options: Optional[Dict[str, Any]] = None
+    # options for the gRPC server accepting upstream requests
+    grpc_server_options: Optional[Dict[str, Any]] = None
+    # additional container environment variables
+    env: Dict[str, str] = field(default_factory=dict)
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """Return the Jina CLI arguments that are set by this config."""
+        kwargs = {
+            'uses_dynamic_batching': self.uses_dynamic_batching,
+            'prefetch': self.prefetch,
+            'timeout_send': self.timeout_send,
+            'timeout_ready': self.timeout_ready,
+            'retries': self.retries,
+            'grpc_channel_options': self.grpc_channel_options,
+            'grpc_server_options': self.grpc_server_options,
+        }
+        return {k: v for k, v in kwargs.items() if v is not None}
+
+    def validate(self, node_name: str, parser) -> None:
+        """
+        Validate the config for the node `node_name` against the Jina argument `parser` of the node.
+
+        :param node_name: name of the Flow node, used in error messages
+        :param parser: the Jina parser used to render the container command of the node
+        """
+        supported = {action.dest for action in parser._actions}
+        for key in self.to_kwargs():
+            if key not in supported:
+                raise ValueError(f'`{key}` is not supported by the Jina node `{node_name}`')
+
+        if self.prefetch is not None and self.prefetch < 0:
+            raise ValueError(f'`prefetch` of the Jina node `{node_name}` must not be negative, got {self.prefetch}')
+        for key in ('timeout_send', 'timeout_ready'):
+            value = getattr(self, key)
+            if value is not None and value != -1 and value <= 0:
+                raise ValueError(f'`{key}` of the Jina node `{node_name}` must be positive or -1, got {value}')
+
+        for endpoint, batching in (self.uses_dynamic_batching or {}).items():
+            if not isinstance(batching, dict):
+                raise ValueError(f'dynamic batching of `{node_name}{endpoint}` must be a dict')
+            if not endpoint.startswith('/'):
+                raise ValueError(f'dynamic batching endpoint `{endpoint}` of `{node_name}` must start with `/`')
+            unknown = set(batching) - DYNAMIC_BATCHING_KEYS
+            if unknown:
+                raise ValueError(f'unknown dynamic batching options {sorted(unknown)} for `{node_name}{endpoint}`')
+            for key, value in batching.items():
+                if not isinstance(value, int) or value <= 0:
+                    raise ValueError(f'dynamic batching `{key}` of `{node_name}{endpoint}` must be a positive int')
+
+        for key, value in self.env.items():
+            if not isinstance(value, str):
+                raise ValueError(f'environment variable `{key}` of `{node_name}` must be a string')
+
+    def apply(self, node_name: str, parser, non_defaults: Dict[str, Any], env: Optional[Dict[str, str]]):
+        """
+        Validate the config and merge it into the container arguments and environment of a node.
+
+        :param node_name: name of the Flow node
+        :param parser: the Jina parser used to render the container command of the node
+        :param non_defaults: the non default Jina arguments of the node, updated in place
+        :param env: the container environment of the node
+        :return: the merged container environment
+        """
+        self.validate(node_name, parser)
+        non_defaults.update(self.to_kwargs())
+        return {**(env or {}), **self.env}
+
+
+def validate_flow_node_configs(configs: Dict[str, Any], node_names, kind: str = 'performance') -> None:
+    """Check that every node of a per node `kind` config exists in the Flow."""
+    unknown = set(configs) - set(node_names) - {GATEWAY_NODE_NAME}
+    if unknown:
+        raise ValueError(f'{kind} config for unknown Flow nodes: {sorted(unknown)}')
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from aws_cdk import (
+    aws_ecs as ecs,
+    aws_ecs_patterns as ecs_patterns,
+    aws_elasticloadbalancingv2 as elbv2,
+    Duration,
+)
+from jina.serve.networking import GrpcConnectionPool
+
+"""
+Rolling deployments of the ECS services of Jina nodes.
+Health checks use the Jina gRPC ping, draining is shortened and failed deployments are rolled back by the ECS circuit
+breaker. Containers use dynamic host ports, so old and new tasks can run side by side on the same instance.
+The ports of a node are pinned to fixed container ports, so the rendered container of an unchanged Executor is the
+same on every synth and a change to one Executor only updates that Executor's task definition and service.
+"""
+
+
+@dataclass
+class JinaRolloutConfig:
+    # percentage of the desired tasks that must keep running during a deployment
+    min_healthy_percent: int = 100
+    # percentage of the desired tasks that may run during a deployment
+    max_healthy_percent: int = 200
+    # roll back to the last completed deployment when the new tasks fail to become healthy
+    circuit_breaker_rollback: bool = True
+    # time the new tasks get to load their models before the load balancer health checks count
+    health_check_grace_period_seconds: int = 120
+    health_check_interval_seconds: int = 10
+    # NLB target groups need the same healthy and unhealthy threshold count, between 2 and 10
+    healthy_threshold_count: int = 2
+    unhealthy_threshold_count: int = 2
+    # time in-flight requests get to finish on a deregistered task
+    deregistration_delay_seconds: int = 30
+    # time between SIGTERM and SIGKILL of the container to finish the requests it is processing
+    stop_timeout_seconds: int = 45
+
+    def validate(self) -> None:
+        """Check the config against the limits of ECS and the NLB target groups."""
+        if not 0 <= self.min_healthy_percent <= 100:
+            raise ValueError(f'`min_healthy_percent` must be between 0 and 100, got {self.min_healthy_percent}')
+        if self.max_healthy_percent < max(100, self.min_healthy_percent):
+            raise ValueError(f'`max_healthy_percent` must be at least 100, got {self.max_healthy_percent}')
+        if self.min_healthy_percent == 100 and self.max_healthy_percent == 100:
+            raise ValueError('a deployment can not make progress with min and max healthy percent of 100')
+        if not 0 <= self.deregistration_delay_seconds <= 3600:
+            raise ValueError('`deregistration_delay_seconds` must be between 0 and 3600')
+        if not 2 <= self.stop_timeout_seconds <= 120:
+            raise ValueError('`stop_timeout_seconds` must be between 2 and 120')
+        if not 5 <= self.health_check_interval_seconds <= 300:
+            raise ValueError('`health_check_interval_seconds` must be between 5 and 300')
+        if self.healthy_threshold_count != self.unhealthy_threshold_count:
+            raise ValueError('`healthy_threshold_count` and `unhealthy_threshold_count` of an NLB target group must '
+                             'be the same')
+        if not 2 <= self.healthy_threshold_count <= 10:
+            raise ValueError('`healthy_threshold_count` and `unhealthy_threshold_count` must be between 2 and 10')
+
+
+def pin_ports(cargs) -> None:
+    """
+    Replace the random ports Jina assigns to a node by the fixed container ports, like the Kubernetes export does.
+    Without this every synth renders a different command and every task definition of the Flow is replaced.
+    """
+    if isinstance(cargs.port, list):
+        # a gateway exposes one port per protocol
+        cargs.port = [GrpcConnectionPool.K8S_PORT + i for i in range(len(cargs.port))]
+    else:
+        cargs.port = GrpcConnectionPool.K8S_PORT
+    cargs.port_monitoring = [GrpcConnectionPool.K8S_PORT_MONITORING] if isinstance(cargs.port_monitoring, list) \
+        else GrpcConnectionPool.K8S_PORT_MONITORING
+
+
+def container_health_check(target: str, config: JinaRolloutConfig, protocol=None) -> ecs.HealthCheck:
+    """
+    Protocol aware health check of the container, `target` is one of `executor`, `gateway` or `flow`.
+    `protocol` is the Jina `protocol` argument of the node, the first protocol is served on the pinned port and is
+    pinged with the matching scheme, defaults to gRPC.
+    """
+    if isinstance(protocol, list):
+        protocol = protocol[0] if protocol else None
+    scheme = str(getattr(protocol, 'name', protocol or 'grpc')).lower()
+    host = f'{scheme}://127.0.0.1:{GrpcConnectionPool.K8S_PORT}'
+    return ecs.HealthCheck(
+        command=['CMD-SHELL', f'jina ping {target} {host} --timeout 3000 || exit 1'],
+        interval=Duration.seconds(config.health_check_interval_seconds),
+        timeout=Duration.seconds(5),
+        retries=config.unhealthy_threshold_count,
+        start_period=Duration.seconds(min(config.health_check_grace_period_seconds, 300)),
+    )
+
+
+def service_kwargs(config: JinaRolloutConfig) -> Dict[str, Any]:
+    """Deployment arguments of the load balanced ECS service of a node."""
+    config.validate()
+    return dict(
+        min_healthy_percent=config.min_healthy_percent,
+        max_healthy_percent=config.max_healthy_percent,
+        circuit_breaker=ecs.DeploymentCircuitBreaker(rollback=config.circuit_breaker_rollback),
+        health_check_grace_period=Duration.seconds(config.health_check_grace_period_seconds),
+    )
+
+
+def tune_target_group(service: ecs_patterns.NetworkLoadBalancedServiceBase, config: JinaRolloutConfig) -> None:
+    """Shorten the health checks and draining of the target group behind the NLB of a node."""
+    service.target_group.configure_health_check(
+        protocol=elbv2.Protocol.TCP,
+        interval=Duration.seconds(config.health_check_interval_seconds),
+        healthy_threshold_count=config.healthy_threshold_count,
+        unhealthy_threshold_count=config.unhealthy_threshold_count,
+    )
+    service.target_group.set_attribute(
+        'deregistration_delay.timeout_seconds', str(config.deregistration_delay_seconds)
+    )
+    # let the in-flight requests of a deregistered target finish instead of resetting the connections
+    service.target_group.set_attribute('deregistration_delay.connection_termination.enabled', 'false')
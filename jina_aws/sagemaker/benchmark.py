@@ -0,0 +1,80 @@
+import argparse
+import importlib.util
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+"""
+Benchmark of the bulk API of the SageMaker proxy against a stubbed SageMaker runtime client.
+The stub sleeps a fixed latency per invocation plus a latency per document, which is enough to compare the throughput
+of different batch sizes and concurrencies locally:
+
+    python -m jina_aws.sagemaker.benchmark --docs 1024 --batch-sizes 1 8 32 128 --concurrency 4
+"""
+
+
+class StubRuntimeClient:
+    def __init__(self, invocation_latency_ms: float, doc_latency_ms: float) -> None:
+        self.invocation_latency_ms = invocation_latency_ms
+        self.doc_latency_ms = doc_latency_ms
+        self.invocations = 0
+
+    def invoke_endpoint(self, EndpointName, ContentType, Accept, Body):
+        self.invocations += 1
+        docs = json.loads(Body)['data']
+        time.sleep((self.invocation_latency_ms + self.doc_latency_ms * len(docs)) / 1000)
+        return {'Body': io.BytesIO(json.dumps(docs).encode('utf-8'))}
+
+
+def load_handler(client):
+    """
+    Load the Lambda handler with the stubbed runtime `client`. `ENDPOINT_NAME` and `AWS_DEFAULT_REGION` must be set in
+    the environment, the handler reads them on import.
+    """
+    spec = importlib.util.spec_from_file_location(
+        'handler', Path(__file__).absolute().parent / 'lambda_src' / 'handler.py'
+    )
+    handler = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(handler)
+    handler.client = client
+    return handler
+
+
+def run(docs: int, batch_size: int, concurrency: int, invocation_latency_ms: float, doc_latency_ms: float):
+    client = StubRuntimeClient(invocation_latency_ms, doc_latency_ms)
+    handler = load_handler(client)
+    handler.BULK_BATCH_SIZE = batch_size
+    handler.BULK_CONCURRENCY = concurrency
+    handler.BULK_MAX_DOCUMENTS = docs
+    event = {'path': '/bulk', 'body': json.dumps({'data': [{'text': f'doc {i}'} for i in range(docs)]})}
+
+    start = time.perf_counter()
+    response = handler.proxy(event, None)
+    elapsed = time.perf_counter() - start
+    assert response['statusCode'] == 200, response['body']
+    return {
+        'batch_size': batch_size,
+        'concurrency': concurrency,
+        'invocations': client.invocations,
+        'seconds': round(elapsed, 3),
+        'docs_per_second': round(docs / elapsed, 1),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput of the SageMaker proxy bulk API per batch size')
+    parser.add_argument('--docs', type=int, default=1024)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--invocation-latency-ms', type=float, default=20)
+    parser.add_argument('--doc-latency-ms', type=float, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault('ENDPOINT_NAME', 'benchmark')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    for batch_size in args.batch_sizes:
+        print(json.dumps(run(args.docs, batch_size, args.concurrency, args.invocation_latency_ms,
+                             args.doc_latency_ms)))
@@ -1,14 +1,137 @@
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 import boto3
-
-client = boto3.client("sagemaker-runtime")
+from botocore.config import Config
 
 ENDPOINT_NAME = os.environ.get("ENDPOINT_NAME", None)
+# maximum number of documents sent in one invocation of the endpoint by the bulk API
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", 32))
+# SageMaker real-time endpoints reject payloads above 6 MB
+BULK_MAX_PAYLOAD_BYTES = int(os.environ.get("BULK_MAX_PAYLOAD_BYTES", 5 * 1024 * 1024))
+# number of concurrent invocations of the endpoint, each one keeps a pooled connection
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", 4))
+# maximum number of documents of one bulk request, sized so that all batches finish before the deadline
+BULK_MAX_DOCUMENTS = int(os.environ.get("BULK_MAX_DOCUMENTS", 1024))
+# API Gateway cuts off REST integrations after 29 seconds, batches still running at the deadline are reported as
+# failed so the documents that did finish are returned instead of a 504
+BULK_TIMEOUT_SECONDS = float(os.environ.get("BULK_TIMEOUT_SECONDS", 27))
+
+client = boto3.client("sagemaker-runtime", config=Config(max_pool_connections=BULK_CONCURRENCY))
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Credentials": True,
+}
+
+
+def invoke(body):
+    sagemaker_response = client.invoke_endpoint(
+        EndpointName=ENDPOINT_NAME,
+        ContentType="application/json",
+        Accept="application/json",
+        Body=json.dumps(body),
+    )
+    return json.loads(sagemaker_response["Body"].read().decode("utf-8"))
+
+
+def split_batches(docs, batch_size, max_payload_bytes):
+    """Split `docs` into `(offset, batch)` pairs of at most `batch_size` documents and `max_payload_bytes` bytes."""
+    batches = []
+    offset, batch, batch_bytes = 0, [], 0
+    for i, doc in enumerate(docs):
+        doc_bytes = len(json.dumps(doc))
+        if batch and (len(batch) >= batch_size or batch_bytes + doc_bytes > max_payload_bytes):
+            batches.append((offset, batch))
+            offset, batch, batch_bytes = i, [], 0
+        batch.append(doc)
+        batch_bytes += doc_bytes
+    if batch:
+        batches.append((offset, batch))
+    return batches
+
+
+def invoke_batch(batch, parameters):
+    """Invoke the endpoint with one batch, returning a `(result, error)` pair per document."""
+    try:
+        results = invoke({"data": batch, "parameters": parameters})
+        if isinstance(results, dict):
+            results = results.get("data", [])
+        if len(results) != len(batch):
+            raise ValueError(f"endpoint returned {len(results)} results for {len(batch)} documents")
+        return [(result, None) for result in results]
+    except Exception as e:
+        print(repr(e))
+        return [(None, repr(e))] * len(batch)
+
+
+def bulk(event, context):
+    """
+    Invoke the endpoint for all documents in `data` of the request, split into endpoint sized batches that are sent
+    concurrently. The results are returned in the order of the documents, failed documents have a `null` result and
+    an entry in `errors`. Requests with more than `BULK_MAX_DOCUMENTS` documents are rejected with a 413.
+    """
+    if ENDPOINT_NAME is None:
+        return {"error": "Environment variable `ENDPOINT_NAME` not defined"}
+    try:
+        body = json.loads(event["body"])
+        if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+            return {
+                "statusCode": 400,
+                "headers": HEADERS,
+                "body": json.dumps({"error": "`data` of a bulk request must be a list of documents"}),
+            }
+        docs = body["data"]
+        parameters = body.get("parameters", {})
+        if len(docs) > BULK_MAX_DOCUMENTS:
+            return {
+                "statusCode": 413,
+                "headers": HEADERS,
+                "body": json.dumps(
+                    {"error": f"{len(docs)} documents exceed the limit of {BULK_MAX_DOCUMENTS} per bulk request"}
+                ),
+            }
+        batches = split_batches(docs, BULK_BATCH_SIZE, BULK_MAX_PAYLOAD_BYTES)
+        print(f"invoking {ENDPOINT_NAME} with {len(docs)} documents in {len(batches)} batches")
+
+        data, errors = [None] * len(docs), []
+        deadline = time.monotonic() + BULK_TIMEOUT_SECONDS
+        pool = ThreadPoolExecutor(max_workers=BULK_CONCURRENCY)
+        try:
+            futures = [(offset, batch, pool.submit(invoke_batch, batch, parameters)) for offset, batch in batches]
+            for offset, batch, future in futures:
+                try:
+                    batch_results = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    batch_results = [(None, f"not finished after {BULK_TIMEOUT_SECONDS} seconds")] * len(batch)
+                for i, (result, error) in enumerate(batch_results, start=offset):
+                    data[i] = result
+                    if error is not None:
+                        errors.append({"index": i, "error": error})
+        finally:
+            # do not wait for the batches that missed the deadline
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return {
+            "statusCode": 207 if errors else 200,
+            "headers": HEADERS,
+            "body": json.dumps({"data": data, "errors": errors}),
+        }
+    except Exception as e:
+        print(repr(e))
+        return {
+            "statusCode": 500,
+            "headers": HEADERS,
+            "body": json.dumps({"error": repr(e)}),
+        }
 
 
 def proxy(event, context):
+    if (event.get("path") or "").rstrip("/").endswith("/bulk"):
+        return bulk(event, context)
     print(event)
     if ENDPOINT_NAME is None:
         return {"error": "Environment variable `ENDPOINT_NAME` not defined"}
@@ -16,32 +139,18 @@ def proxy(event, context):
         body = json.loads(event["body"])
         print(body)
 
-        sagemaker_response = client.invoke_endpoint(
-            EndpointName=ENDPOINT_NAME,
-            ContentType="application/json",
-            Accept="application/json",
-            Body=json.dumps(body),
-        )
-        sagemaker_response = json.loads(sagemaker_response["Body"].read().decode("utf-8"))[0]
+        sagemaker_response = invoke(body)[0]
 
         print(sagemaker_response)
         return {
             "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Credentials": True,
-            },
+            "headers": HEADERS,
             "body": json.dumps({"data": sagemaker_response}),
         }
     except Exception as e:
         print(repr(e))
         return {
             "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Credentials": True,
-            },
+            "headers": HEADERS,
             "body": json.dumps({"error": repr(e)}),
         }
@@ -3,16 +3,23 @@
 # with examples from the CDK Developer's Guide, which are in the process of
 # being updated to use `cdk`.  You may delete this import if you don't need it.
 import copy
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from aws_cdk import aws_sagemaker
 from constructs import Construct
+from jina.parsers import set_deployment_parser
+
+from jina_aws.performance import JinaPerformanceConfig
 
 """
 The Jina custom Gateway from a Jina Deployment is mapped to a SageMaker EndpointConstruct.
 The Gateway is represented as the SageMaker model which is then exposed by the EndpointConstruct.
 """
 
+# range of `ContainerStartupHealthCheckTimeoutInSeconds` accepted by SageMaker
+MIN_STARTUP_TIMEOUT_SECONDS = 60
+MAX_STARTUP_TIMEOUT_SECONDS = 3600
+
 
 class SageMakerEndpointConstruct(Construct):
     def __init__(
@@ -25,12 +32,32 @@ class SageMakerEndpointConstruct(Construct):
         model_name: str,
         endpoint_config_name: str,
         endpoint_name: str,
+        performance: Optional[JinaPerformanceConfig] = None,
     ) -> None:
         super().__init__(scope, construct_id)
         cargs = copy.copy(jina_deployment_args)
 
+        # the SageMaker container command is fixed by the image, only the environment and the readiness
+        # timeout of the endpoint can be tuned
+        environment = cargs.env
+        startup_timeout = None
+        if performance:
+            unsupported = set(performance.to_kwargs()) - {'timeout_ready'}
+            if unsupported:
+                raise ValueError(f'{sorted(unsupported)} can not be passed to the SageMaker container command, '
+                                 f'configure them in the Executor config of the image instead')
+            performance.validate(model_name, set_deployment_parser())
+            environment = {**(environment or {}), **performance.env}
+            if performance.timeout_ready is not None:
+                startup_timeout = performance.timeout_ready // 1000
+                if performance.timeout_ready % 1000 or \
+                        not MIN_STARTUP_TIMEOUT_SECONDS <= startup_timeout <= MAX_STARTUP_TIMEOUT_SECONDS:
+                    raise ValueError(f'`timeout_ready` of a SageMaker endpoint must be whole seconds between '
+                                     f'{MIN_STARTUP_TIMEOUT_SECONDS * 1000} and {MAX_STARTUP_TIMEOUT_SECONDS * 1000} '
+                                     f'ms, got {performance.timeout_ready}')
+
         # defines and creates container configuration for deployment
-        container = aws_sagemaker.CfnModel.ContainerDefinitionProperty(environment=cargs.env, image=cargs.uses)
+        container = aws_sagemaker.CfnModel.ContainerDefinitionProperty(environment=environment, image=cargs.uses)
 
         # creates SageMaker Model Instance
         model = aws_sagemaker.CfnModel(
@@ -53,6 +80,7 @@ class SageMakerEndpointConstruct(Construct):
                     model_name=model.model_name,
                     initial_variant_weight=1.0,
                     variant_name=model.model_name,
+                    container_startup_health_check_timeout_in_seconds=startup_timeout,
                 )
             ],
         )
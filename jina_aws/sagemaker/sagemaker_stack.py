@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 
 from aws_cdk import (
     aws_iam as iam,
@@ -11,6 +12,7 @@ from aws_cdk import (
 from constructs import Construct
 from jina import Deployment as JinaDeployment
 
+from jina_aws.performance import JinaPerformanceConfig
 from jina_aws.sagemaker.sagemaker_construct import SageMakerEndpointConstruct
 
 # policies based on https://docs.aws.amazon.com/sagemaker/latest/dg/sagemaker-roles.html#sagemaker-roles-createmodel-perms
@@ -46,10 +48,22 @@ class JinaSageMakerStack(Stack):
                  model_name: str = 'custom_inference',
                  endpoint_config_name: str = 'custom-inference-endpoint-config',
                  endpoint_name: str = 'custom-inference',
+                 performance: Optional[JinaPerformanceConfig] = None,
+                 bulk_batch_size: int = 32,
+                 bulk_concurrency: int = 4,
+                 bulk_max_documents: int = 1024,
                  **kwargs
                  ) -> None:
         super().__init__(scope, id, **kwargs)
 
+        # API Gateway cuts off the `/bulk` resource after 29 seconds, `bulk_max_documents` must be small enough that
+        # ceil(bulk_max_documents / bulk_batch_size) / bulk_concurrency invocations of the endpoint finish in that time
+        for name, value in (('bulk_batch_size', bulk_batch_size),
+                            ('bulk_concurrency', bulk_concurrency),
+                            ('bulk_max_documents', bulk_max_documents)):
+            if value < 1:
+                raise ValueError(f'`{name}` must be at least 1, got {value}')
+
         # creates new iam role for sagemaker using `iam_sagemaker_actions` as permissions or uses provided arn
         execution_role = iam.Role(
             self, "sagemaker_execution_role", assumed_by=iam.ServicePrincipal("sagemaker.amazonaws.com")
@@ -66,6 +80,7 @@ class JinaSageMakerStack(Stack):
             model_name=model_name,
             endpoint_config_name=endpoint_config_name,
             endpoint_name=endpoint_name,
+            performance=performance,
         )
 
         # lambda function that will be exposed by the API Gateway
@@ -78,7 +93,15 @@ class JinaSageMakerStack(Stack):
             handler="handler.proxy",
             timeout=Duration.seconds(60),
             runtime=aws_lambda.Runtime.PYTHON_3_10,
-            environment={"ENDPOINT_NAME": endpoint.endpoint_name},
+            environment={
+                "ENDPOINT_NAME": endpoint.endpoint_name,
+                # the `/bulk` resource splits requests into batches of `bulk_batch_size` documents
+                "BULK_BATCH_SIZE": str(bulk_batch_size),
+                "BULK_CONCURRENCY": str(bulk_concurrency),
+                "BULK_MAX_DOCUMENTS": str(bulk_max_documents),
+                # leave the Lambda time to respond before the 29 seconds integration timeout of API Gateway
+                "BULK_TIMEOUT_SECONDS": "27",
+            },
         )
 
         # add policy for invoking
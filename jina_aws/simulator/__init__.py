@@ -0,0 +1,372 @@
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from jina_aws.flow import ASG_INSTANCE_TYPE, ASG_MAX_CAPACITY, ASG_MIN_CAPACITY
+from jina_aws.launch import JinaLaunchConfig
+from jina_aws.performance import GATEWAY_NODE_NAME, validate_flow_node_configs
+
+"""
+Cost and throughput simulator of a Jina Flow deployed by the `JinaFlowStack`.
+The simulator combines the Flow topology with per Executor throughput and latency profiles measured by local
+benchmarks, and predicts the end-to-end throughput, p99 latency, bottleneck node and hourly cost of the replicas of
+every node without deploying it.
+
+The model follows the stack: every request visits every Executor, a node with `replicas` replicas serves
+`replicas * throughput_rps` requests per second and nodes are not sharded. EC2 tasks are bin-packed by their memory
+limit onto the instances of the single auto scaling group of the cluster, which bounds the number of instances.
+Fargate tasks are billed per vCPU and GB hour. Queueing adds the mean wait of an M/M/1 queue with the p50 latency as
+service time, `p50 * utilization / (1 - utilization)`, to the p99 latency of a node.
+"""
+
+# on-demand hourly prices in USD for us-east-1
+INSTANCE_HOURLY_PRICES = {
+    't2.micro': 0.0116,
+    't3.medium': 0.0416,
+    't4g.medium': 0.0336,
+    'c5.large': 0.085,
+    'c5.xlarge': 0.17,
+    'c5.2xlarge': 0.34,
+    'c6g.xlarge': 0.136,
+    'm5.large': 0.096,
+    'm5.xlarge': 0.192,
+    'm5.2xlarge': 0.384,
+    'g4dn.xlarge': 0.526,
+    'g4dn.2xlarge': 0.752,
+    'g5.xlarge': 1.006,
+}
+
+INSTANCE_MEMORY_MIB = {
+    't2.micro': 1024,
+    't3.medium': 4096,
+    't4g.medium': 4096,
+    'c5.large': 4096,
+    'c5.xlarge': 8192,
+    'c5.2xlarge': 16384,
+    'c6g.xlarge': 8192,
+    'm5.large': 8192,
+    'm5.xlarge': 16384,
+    'm5.2xlarge': 32768,
+    'g4dn.xlarge': 16384,
+    'g4dn.2xlarge': 32768,
+    'g5.xlarge': 16384,
+}
+
+# memory of an instance kept by the OS and the ECS agent, which is not available to tasks
+ECS_RESERVED_MEMORY_MIB = 256
+
+# on-demand Fargate prices in USD for us-east-1 per vCPU hour and per GB hour, Fargate Spot is costed at these
+# prices as an upper bound
+FARGATE_HOURLY_PRICES = {
+    'X86_64': (0.04048, 0.004445),
+    'ARM64': (0.03238, 0.00356),
+}
+
+
+@dataclass
+class ExecutorProfile:
+    # requests per second served by a single replica at saturation
+    throughput_rps: float
+    p50_latency_ms: float
+    p99_latency_ms: float
+
+    def validate(self, name: str) -> None:
+        """Check that the profile `name` can be simulated."""
+        if self.throughput_rps <= 0:
+            raise ValueError(f'`throughput_rps` of the profile `{name}` must be positive, got {self.throughput_rps}')
+        if not 0 < self.p50_latency_ms <= self.p99_latency_ms:
+            raise ValueError(f'the latencies of the profile `{name}` must satisfy 0 < p50 <= p99, got '
+                             f'{self.p50_latency_ms} and {self.p99_latency_ms}')
+
+
+@dataclass
+class FlowNode:
+    name: str
+    needs: Set[str] = field(default_factory=set)
+    uses: Optional[str] = None
+    replicas: int = 1
+    launch: JinaLaunchConfig = field(default_factory=JinaLaunchConfig)
+
+
+@dataclass
+class NodePrediction:
+    throughput_rps: float
+    p99_latency_ms: float
+    utilization: float
+
+
+@dataclass
+class FlowPrediction:
+    throughput_rps: float
+    p99_latency_ms: float
+    bottleneck: str
+    # instances of the auto scaling group running the EC2 tasks
+    instances: int
+    hourly_cost: float
+    nodes: Dict[str, NodePrediction]
+
+
+def load_profiles(path: str) -> Dict[str, Dict[str, ExecutorProfile]]:
+    """
+    Load the benchmark profiles from a JSON file of the form
+    `{"<node name or uses>": {"<platform>": {"throughput_rps": .., "p50_latency_ms": .., "p99_latency_ms": ..}}}`,
+    where the platform is the instance type for EC2 nodes and `fargate-<cpu>` for Fargate nodes.
+    """
+    with open(path) as f:
+        raw = json.load(f)
+    profiles = {}
+    for executor, platform_profiles in raw.items():
+        profiles[executor] = {}
+        for platform, profile in platform_profiles.items():
+            profiles[executor][platform] = ExecutorProfile(**profile)
+            profiles[executor][platform].validate(f'{executor}/{platform}')
+    return profiles
+
+
+def profile_platform(launch: JinaLaunchConfig, instance_type: str) -> str:
+    """The key of the profiles of a node launched with `launch` on a cluster of `instance_type` instances."""
+    return f'fargate-{launch.cpu}' if launch.is_fargate else instance_type
+
+
+def flow_topology(jina_flow, launch: Optional[Dict[str, JinaLaunchConfig]] = None) -> Dict[str, FlowNode]:
+    """
+    Read the Executor nodes of a Jina Flow, the Gateway is not simulated.
+
+    :param jina_flow: the Flow deployed by the `JinaFlowStack`
+    :param launch: the per node launch config passed to the `JinaFlowStack`
+    :return: the Executor nodes keyed by name
+    """
+    launch = launch or {}
+    nodes = {}
+    for node_name, deployment in jina_flow._deployment_nodes.items():
+        if node_name == GATEWAY_NODE_NAME:
+            continue
+        if getattr(deployment.args, 'shards', 1) > 1:
+            raise ValueError(f'`{node_name}` has {deployment.args.shards} shards, the `JinaFlowStack` does not '
+                             f'deploy shards')
+        nodes[node_name] = FlowNode(
+            name=node_name,
+            needs=set(deployment.needs or ()) - {GATEWAY_NODE_NAME},
+            uses=deployment.args.uses,
+            replicas=deployment.args.replicas,
+            launch=launch.get(node_name, JinaLaunchConfig()),
+        )
+    return nodes
+
+
+class FlowSimulator:
+    def __init__(self,
+                 nodes: Dict[str, FlowNode],
+                 profiles: Dict[str, Dict[str, ExecutorProfile]],
+                 instance_type: str = ASG_INSTANCE_TYPE,
+                 max_capacity: int = ASG_MAX_CAPACITY,
+                 gateway_replicas: int = 1,
+                 gateway_launch: Optional[JinaLaunchConfig] = None,
+                 prices: Optional[Dict[str, float]] = None,
+                 ) -> None:
+        """
+        :param nodes: the Executor nodes of the Flow
+        :param profiles: the benchmark profiles, keyed by node name or uses and then by platform
+        :param instance_type: instance type of the auto scaling group
+        :param max_capacity: maximum number of instances of the auto scaling group
+        :param gateway_replicas: replicas of the Gateway, which take capacity but are not simulated
+        :param gateway_launch: the launch config of the Gateway
+        :param prices: hourly prices of the instance types
+        """
+        self.nodes = nodes
+        self.profiles = profiles
+        self.instance_type = instance_type
+        self.max_capacity = max_capacity
+        self.gateway_replicas = gateway_replicas
+        self.gateway_launch = gateway_launch or JinaLaunchConfig()
+        self.prices = prices or INSTANCE_HOURLY_PRICES
+        if instance_type not in self.prices or instance_type not in INSTANCE_MEMORY_MIB:
+            raise ValueError(f'no hourly price or memory for the instance type `{instance_type}`')
+        for executor, platform_profiles in profiles.items():
+            for platform, profile in platform_profiles.items():
+                profile.validate(f'{executor}/{platform}')
+        instance_memory = INSTANCE_MEMORY_MIB[instance_type] - ECS_RESERVED_MEMORY_MIB
+        for name, launch in [(GATEWAY_NODE_NAME, self.gateway_launch)] + \
+                            [(name, node.launch) for name, node in nodes.items()]:
+            launch.validate(name)
+            if not launch.is_fargate and launch.memory_limit_mib > instance_memory:
+                raise ValueError(f'the {launch.memory_limit_mib} MiB tasks of `{name}` do not fit on `{instance_type}`')
+        self.order = self._topological_order()
+
+    @classmethod
+    def from_flow(cls,
+                  jina_flow,
+                  profiles: Dict[str, Dict[str, ExecutorProfile]],
+                  launch: Optional[Dict[str, JinaLaunchConfig]] = None,
+                  **kwargs,
+                  ) -> 'FlowSimulator':
+        """Simulate `jina_flow` as deployed by the `JinaFlowStack` with the per node `launch` config."""
+        launch = launch or {}
+        nodes = flow_topology(jina_flow, launch)
+        validate_flow_node_configs(launch, nodes.keys(), kind='launch')
+        return cls(
+            nodes,
+            profiles,
+            gateway_replicas=jina_flow.gateway_args.replicas,
+            gateway_launch=launch.get(GATEWAY_NODE_NAME),
+            **kwargs,
+        )
+
+    def _topological_order(self) -> List[str]:
+        order, visiting = [], set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f'the Flow contains a cycle through `{name}`')
+            visiting.add(name)
+            for need in sorted(self.nodes[name].needs):
+                if need not in self.nodes:
+                    raise ValueError(f'`{name}` needs the unknown node `{need}`')
+                visit(need)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def profile(self, node_name: str) -> ExecutorProfile:
+        node = self.nodes[node_name]
+        platform = profile_platform(node.launch, self.instance_type)
+        for key in (node_name, node.uses):
+            if key in self.profiles and platform in self.profiles[key]:
+                return self.profiles[key][platform]
+        raise ValueError(f'no benchmark profile for `{node_name}` on `{platform}`')
+
+    def current_config(self) -> Dict[str, int]:
+        """The replicas of every node of the Flow as deployed."""
+        return {name: node.replicas for name, node in self.nodes.items()}
+
+    def _tasks(self, replicas: Dict[str, int]) -> List[JinaLaunchConfig]:
+        tasks = [self.gateway_launch] * self.gateway_replicas
+        for name, node in self.nodes.items():
+            tasks += [node.launch] * replicas[name]
+        return tasks
+
+    def instances(self, replicas: Dict[str, int]) -> int:
+        """Instances of the auto scaling group needed by the EC2 tasks, placed first fit by decreasing memory."""
+        instance_memory = INSTANCE_MEMORY_MIB[self.instance_type] - ECS_RESERVED_MEMORY_MIB
+        free_memory = []
+        ec2_tasks = [task.memory_limit_mib for task in self._tasks(replicas) if not task.is_fargate]
+        for memory in sorted(ec2_tasks, reverse=True):
+            for i, free in enumerate(free_memory):
+                if free >= memory:
+                    free_memory[i] -= memory
+                    break
+            else:
+                free_memory.append(instance_memory - memory)
+        return max(ASG_MIN_CAPACITY, len(free_memory))
+
+    def _hourly_cost(self, replicas: Dict[str, int]) -> float:
+        cost = self.instances(replicas) * self.prices[self.instance_type]
+        for task in self._tasks(replicas):
+            if task.is_fargate:
+                vcpu_price, gb_price = FARGATE_HOURLY_PRICES['ARM64' if task.arm64 else 'X86_64']
+                cost += task.cpu / 1024 * vcpu_price + task.memory_limit_mib / 1024 * gb_price
+        return cost
+
+    def predict(self, replicas: Dict[str, int], offered_rps: Optional[float] = None) -> FlowPrediction:
+        """
+        Predict the Flow for the replicas of every node.
+
+        :param replicas: the candidate replicas, keyed by node name
+        :param offered_rps: the request rate to evaluate the latency at, defaults to 70% of the Flow throughput
+        :return: the prediction of the Flow and its nodes
+        """
+        missing = set(self.nodes) - set(replicas)
+        if missing:
+            raise ValueError(f'no replicas for the nodes {sorted(missing)}')
+        invalid = sorted(name for name in self.nodes if replicas[name] < 1)
+        if invalid:
+            raise ValueError(f'the nodes {invalid} need at least one replica')
+        instances = self.instances(replicas)
+        if instances > self.max_capacity:
+            raise ValueError(f'the EC2 tasks need {instances} `{self.instance_type}` instances, the auto scaling '
+                             f'group has at most {self.max_capacity}')
+
+        capacities = {name: replicas[name] * self.profile(name).throughput_rps for name in self.order}
+        bottleneck = min(self.order, key=lambda name: capacities[name])
+        throughput = capacities[bottleneck]
+        if offered_rps is None:
+            offered_rps = 0.7 * throughput
+
+        nodes, latency_to = {}, {}
+        for name in self.order:
+            profile = self.profile(name)
+            utilization = offered_rps / capacities[name]
+            if utilization < 1:
+                p99 = profile.p99_latency_ms + profile.p50_latency_ms * utilization / (1 - utilization)
+            else:
+                p99 = math.inf
+            latency_to[name] = p99 + max((latency_to[need] for need in self.nodes[name].needs), default=0)
+            nodes[name] = NodePrediction(throughput_rps=capacities[name], p99_latency_ms=p99, utilization=utilization)
+
+        return FlowPrediction(
+            throughput_rps=throughput,
+            p99_latency_ms=max(latency_to.values(), default=0),
+            bottleneck=bottleneck,
+            instances=instances,
+            hourly_cost=self._hourly_cost(replicas),
+            nodes=nodes,
+        )
+
+    def recommend(self,
+                  target_rps: float,
+                  p99_latency_budget_ms: Optional[float] = None,
+                  max_utilization: float = 0.7,
+                  max_replicas: int = 32,
+                  ) -> Dict[str, int]:
+        """
+        Recommend the fewest replicas that serve `target_rps` with every node below `max_utilization` and the EC2
+        tasks within the capacity of the auto scaling group. If a p99 latency budget is given, the node adding most
+        queueing latency gets more replicas until the budget is met.
+        """
+        replicas = {}
+        for name in self.nodes:
+            replicas[name] = max(1, math.ceil(target_rps / (max_utilization * self.profile(name).throughput_rps)))
+            if replicas[name] > max_replicas:
+                raise ValueError(f'`{name}` can not serve {target_rps} rps with at most {max_replicas} replicas')
+        prediction = self.predict(replicas, offered_rps=target_rps)
+
+        if p99_latency_budget_ms is not None:
+            idle = self.predict(replicas, offered_rps=0)
+            if idle.p99_latency_ms > p99_latency_budget_ms:
+                raise ValueError(f'the p99 latency of the idle Flow exceeds the budget of {p99_latency_budget_ms} ms')
+            while prediction.p99_latency_ms > p99_latency_budget_ms:
+                scalable = [
+                    name for name in self.nodes
+                    if replicas[name] < max_replicas and self.instances({**replicas, name: replicas[name] + 1}) <=
+                    self.max_capacity
+                ]
+                if not scalable:
+                    raise ValueError(f'the p99 latency budget of {p99_latency_budget_ms} ms can not be met')
+                # scale the node whose latency is most inflated by queueing
+                slowest = max(scalable, key=lambda name: prediction.nodes[name].p99_latency_ms -
+                              self.profile(name).p99_latency_ms)
+                replicas[slowest] += 1
+                prediction = self.predict(replicas, offered_rps=target_rps)
+        return replicas
+
+    def apply_recommendation(self, jina_flow, replicas: Dict[str, int]) -> None:
+        """
+        Write recommended replicas into the Flow, which the `JinaFlowStack` uses as desired count of the services.
+        Only the replicas are written back, so recommendations of a simulated auto scaling group other than the one of
+        the stack are rejected.
+        """
+        if (self.instance_type, self.max_capacity) != (ASG_INSTANCE_TYPE, ASG_MAX_CAPACITY):
+            raise ValueError(f'the recommendation is for {self.max_capacity} `{self.instance_type}` instances, the '
+                             f'`JinaFlowStack` runs at most {ASG_MAX_CAPACITY} `{ASG_INSTANCE_TYPE}` instances')
+        unknown = set(replicas) - set(self.nodes)
+        if unknown:
+            raise ValueError(f'replicas for unknown Flow nodes: {sorted(unknown)}')
+        self.predict({**self.current_config(), **replicas})
+        for node_name, node_replicas in replicas.items():
+            jina_flow._deployment_nodes[node_name].args.replicas = node_replicas
@@ -0,0 +1,19 @@
+import aws_cdk.assertions as assertions
+
+
+def launch_configuration(stack):
+    """The launch configuration of the auto scaling group of `stack`."""
+    template = assertions.Template.from_stack(stack)
+    return next(iter(template.find_resources('AWS::AutoScaling::LaunchConfiguration').values()))
+
+
+def user_data(stack):
+    """The literal parts of the user data of the auto scaling group of `stack`."""
+    parts = launch_configuration(stack)['Properties']['UserData']['Fn::Base64']['Fn::Join'][1]
+    return ''.join(part for part in parts if isinstance(part, str))
+
+
+def pre_pull_images(stack):
+    """The images pulled on boot by the instances of `stack`, `None` if nothing is pulled."""
+    parameters = assertions.Template.from_stack(stack).find_resources('AWS::SSM::Parameter')
+    return next(iter(parameters.values()))['Properties']['Value'] if parameters else None
@@ -0,0 +1,109 @@
+import importlib.util
+from pathlib import Path
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+from aws_cdk import aws_autoscaling as autoscaling
+from jina import Flow
+
+from jina_aws.capacity import (
+    ECR_REGISTRY,
+    JinaWarmPoolConfig,
+    PREPARE_METRIC_NAME,
+    PULL_SCRIPT,
+    ecr_registries,
+    pull_user_data,
+    registry_images,
+)
+from jina_aws.flow import JinaFlowStack
+from tests.unit.helpers import launch_configuration, pre_pull_images, user_data
+
+ECR_IMAGE = '123456789012.dkr.ecr.eu-west-1.amazonaws.com/encoder:1.0'
+
+
+def test_registry_images_strips_docker_and_skips_hub_sources():
+    assert registry_images([
+        'docker://jinaai/encoder:1.0',
+        'jinaai://jina-ai/TextToImage',
+        None,
+        'jinaai/encoder:1.0',
+        ECR_IMAGE,
+    ]) == ['jinaai/encoder:1.0', ECR_IMAGE]
+
+
+def test_ecr_registries():
+    assert ecr_registries(['jinaai/encoder:1.0', ECR_IMAGE, ECR_IMAGE.replace('encoder', 'indexer')]) == \
+           ['123456789012.dkr.ecr.eu-west-1.amazonaws.com']
+
+
+def test_pull_user_data_installs_per_boot_script_and_skips_metric_on_failed_pull():
+    commands = pull_user_data('images', 'stack')
+
+    script = commands[commands.index(f"cat > {PULL_SCRIPT} <<'EOF'") + 1:commands.index('EOF')]
+    assert PULL_SCRIPT.startswith('/var/lib/cloud/scripts/per-boot/')
+    assert any('aws ssm get-parameter --name images' in line for line in script)
+    assert 'docker pull $IMAGE || PULL_FAILED=1' in [line.strip() for line in script]
+    assert commands[-1].startswith(f'if {PULL_SCRIPT}; then')
+    assert PREPARE_METRIC_NAME in commands[-1]
+
+
+def test_pull_script_registry_pattern_matches_ecr_only():
+    assert ECR_REGISTRY.match(ECR_IMAGE.split('/')[0]).group(1) == 'eu-west-1'
+    assert not ECR_REGISTRY.match('docker.io')
+
+
+@pytest.mark.parametrize('warm_pool', [
+    JinaWarmPoolConfig(pool_state=autoscaling.PoolState.HIBERNATED),
+    JinaWarmPoolConfig(min_size=-1),
+    JinaWarmPoolConfig(min_size=2, max_group_prepared_capacity=1),
+])
+def test_warm_pool_validate_rejects_invalid_config(warm_pool):
+    with pytest.raises(ValueError):
+        warm_pool.validate()
+
+
+def test_flow_stack_prefers_cached_images_only_when_opted_in():
+    flow = Flow().add(name='encoder', uses='docker://jinaai/encoder:1.0')
+
+    stack = JinaFlowStack(core.App(), 'jina-flow', jina_flow=flow)
+    assert pre_pull_images(stack) == 'jinaai/encoder:1.0'
+    assert 'prefer-cached' not in user_data(stack)
+    assertions.Template.from_stack(stack).resource_count_is('AWS::AutoScaling::WarmPool', 0)
+
+    stack = JinaFlowStack(core.App(), 'jina-flow', jina_flow=flow,
+                          warm_pool=JinaWarmPoolConfig(prefer_cached_images=True))
+    assert 'ECS_IMAGE_PULL_BEHAVIOR=prefer-cached' in user_data(stack)
+    assertions.Template.from_stack(stack).has_resource_properties('AWS::AutoScaling::WarmPool', {
+        'MinSize': 1,
+        'PoolState': 'Stopped',
+    })
+
+
+def test_image_change_keepslaunch_configuration():
+    first = JinaFlowStack(core.App(), 'jina-flow', jina_flow=Flow().add(name='encoder', uses='docker://encoder:1.0'))
+    second = JinaFlowStack(core.App(), 'jina-flow', jina_flow=Flow().add(name='encoder', uses='docker://encoder:1.1'))
+
+    assert launch_configuration(first) == launch_configuration(second)
+    assert (pre_pull_images(first), pre_pull_images(second)) == ('encoder:1.0', 'encoder:1.1')
+
+
+def test_scale_out_metric_handler(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    spec = importlib.util.spec_from_file_location(
+        'scale_out_metric',
+        Path(__file__).parents[2] / 'jina_aws' / 'capacity' / 'lambda_src' / 'scale_out_metric.py',
+    )
+    scale_out_metric = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(scale_out_metric)
+    metric_data = []
+    monkeypatch.setattr(scale_out_metric.cloudwatch, 'put_metric_data', lambda **kwargs: metric_data.append(kwargs))
+
+    event = {'detail': {'Origin': 'WarmPool', 'Destination': 'AutoScalingGroup',
+                        'StartTime': '2023-06-01T10:00:00.000Z', 'EndTime': '2023-06-01T10:00:42.500Z'}}
+    assert scale_out_metric.handler(event, None) == 42.5
+    assert metric_data[0]['MetricData'][0]['Dimensions'][1] == {'Name': 'Origin', 'Value': 'WarmPool'}
+
+    event['detail']['Destination'] = 'WarmPool'
+    assert scale_out_metric.handler(event, None) is None
+    assert len(metric_data) == 1
@@ -0,0 +1,62 @@
+import json
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+from jina import Deployment
+
+from jina_aws.capacity import JinaWarmPoolConfig
+from jina_aws.deployment import JinaDeploymentStack
+from jina_aws.launch import FARGATE, JinaLaunchConfig
+from jina_aws.performance import JinaPerformanceConfig
+from jina_aws.rollout import JinaRolloutConfig
+from tests.unit.helpers import pre_pull_images
+
+
+def _container(template):
+    task_definition = next(iter(template.find_resources('AWS::ECS::TaskDefinition').values()))
+    return task_definition['Properties'], task_definition['Properties']['ContainerDefinitions'][0]
+
+
+def test_fargate_spot_deployment():
+    stack = JinaDeploymentStack(
+        core.App(), 'jina-deployment',
+        jina_deployment=Deployment(uses='docker://jinaai/encoder:1.0'),
+        launch=JinaLaunchConfig(launch_type=FARGATE, cpu=512, memory_limit_mib=1024, spot=True),
+    )
+    template = assertions.Template.from_stack(stack)
+
+    task_definition, _ = _container(template)
+    assert task_definition['NetworkMode'] == 'awsvpc'
+    assert (task_definition['Cpu'], task_definition['Memory']) == ('512', '1024')
+    template.has_resource_properties('AWS::ECS::ClusterCapacityProviderAssociations', {
+        'CapacityProviders': assertions.Match.array_with(['FARGATE_SPOT']),
+    })
+    template.has_resource_properties('AWS::ECS::Service', {
+        'CapacityProviderStrategy': [{'CapacityProvider': 'FARGATE_SPOT', 'Weight': 1}],
+    })
+    assert pre_pull_images(stack) is None
+
+
+def test_ec2_deployment_with_performance_config():
+    batching = {'/encode': {'preferred_batch_size': 16, 'timeout': 50}}
+    stack = JinaDeploymentStack(
+        core.App(), 'jina-deployment',
+        jina_deployment=Deployment(name='encoder', uses='docker://jinaai/encoder:1.0', replicas=2),
+        performance=JinaPerformanceConfig(uses_dynamic_batching=batching, env={'OMP_NUM_THREADS': '2'}),
+        warm_pool=JinaWarmPoolConfig(),
+        rollout=JinaRolloutConfig(min_healthy_percent=50),
+    )
+    template = assertions.Template.from_stack(stack)
+
+    task_definition, container = _container(template)
+    assert task_definition['NetworkMode'] == 'bridge'
+    entry_point = container['EntryPoint']
+    assert json.loads(entry_point[entry_point.index('--uses-dynamic-batching') + 1]) == batching
+    assert '--replicas' not in entry_point
+    assert {'Name': 'OMP_NUM_THREADS', 'Value': '2'} in container['Environment']
+    template.has_resource_properties('AWS::ECS::Service', {
+        'DesiredCount': 2,
+        'DeploymentConfiguration': assertions.Match.object_like({'MinimumHealthyPercent': 50}),
+    })
+    template.resource_count_is('AWS::AutoScaling::WarmPool', 1)
+    assert pre_pull_images(stack) == 'jinaai/encoder:1.0'
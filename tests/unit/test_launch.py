@@ -0,0 +1,104 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+from jina import Flow
+
+from jina_aws.flow import JinaFlowStack
+from jina_aws.launch import EC2, FARGATE, JinaLaunchConfig
+from tests.unit.helpers import pre_pull_images
+
+
+def _template(stack):
+    return assertions.Template.from_stack(stack)
+
+
+def _task_definition(template, node_name):
+    task_definitions = template.find_resources('AWS::ECS::TaskDefinition')
+    return task_definitions[next(k for k in task_definitions if k.startswith(node_name))]['Properties']
+
+
+def _mixed_stack(launch):
+    flow = Flow().add(name='encoder', uses='docker://jinaai/encoder:1.0') \
+        .add(name='ranker', uses='docker://jinaai/ranker:1.0')
+    return JinaFlowStack(core.App(), 'jina-flow', jina_flow=flow, launch=launch)
+
+
+@pytest.mark.parametrize('config', [
+    JinaLaunchConfig(),
+    JinaLaunchConfig(launch_type=FARGATE, cpu=256, memory_limit_mib=2048),
+    JinaLaunchConfig(launch_type=FARGATE, cpu=1024, memory_limit_mib=3072, arm64=True),
+    JinaLaunchConfig(launch_type=FARGATE, cpu=8192, memory_limit_mib=20480, spot=True),
+    JinaLaunchConfig(launch_type=FARGATE, cpu=16384, memory_limit_mib=122880),
+])
+def test_validate_accepts_supported_config(config):
+    config.validate('encoder')
+
+
+@pytest.mark.parametrize('config, has_volumes', [
+    (JinaLaunchConfig(launch_type='EXTERNAL'), False),
+    (JinaLaunchConfig(launch_type=EC2, spot=True), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=384), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=256, memory_limit_mib=1536), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=256, memory_limit_mib=3072), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=512, memory_limit_mib=512), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=8192, memory_limit_mib=17408), False),
+    (JinaLaunchConfig(launch_type=FARGATE, cpu=16384, memory_limit_mib=36864), False),
+    (JinaLaunchConfig(launch_type=FARGATE, arm64=True, spot=True), False),
+    (JinaLaunchConfig(launch_type=FARGATE), True),
+])
+def test_validate_rejects_invalid_config(config, has_volumes):
+    with pytest.raises(ValueError):
+        config.validate('encoder', has_volumes=has_volumes)
+
+
+def test_mixed_flow_renders_ec2_and_fargate_task_definitions():
+    template = _template(_mixed_stack({
+        'gateway': JinaLaunchConfig(launch_type=FARGATE, cpu=512, memory_limit_mib=1024, arm64=True),
+        'ranker': JinaLaunchConfig(launch_type=FARGATE, cpu=1024, memory_limit_mib=2048),
+    }))
+
+    encoder = _task_definition(template, 'encoder')
+    assert encoder['NetworkMode'] == 'bridge'
+    assert encoder['RequiresCompatibilities'] == ['EC2']
+    assert 'RuntimePlatform' not in encoder
+
+    ranker = _task_definition(template, 'ranker')
+    assert ranker['NetworkMode'] == 'awsvpc'
+    assert ranker['RequiresCompatibilities'] == ['FARGATE']
+    assert (ranker['Cpu'], ranker['Memory']) == ('1024', '2048')
+    assert ranker['RuntimePlatform']['CpuArchitecture'] == 'X86_64'
+
+    gateway = _task_definition(template, 'gateway')
+    assert gateway['NetworkMode'] == 'awsvpc'
+    assert gateway['RuntimePlatform']['CpuArchitecture'] == 'ARM64'
+
+    template.resource_count_is('AWS::ECS::Service', 3)
+    template.has_resource_properties('AWS::ECS::Service', {'LaunchType': 'FARGATE'})
+    # Fargate tasks only accept the gRPC port from inside the VPC
+    ingress = [
+        rule
+        for security_group in template.find_resources('AWS::EC2::SecurityGroup').values()
+        for rule in security_group['Properties'].get('SecurityGroupIngress', [])
+        if rule.get('FromPort') == 8080
+    ]
+    assert len(ingress) == 2
+    assert all(rule['CidrIp'] == {'Fn::GetAtt': [rule['CidrIp']['Fn::GetAtt'][0], 'CidrBlock']} for rule in ingress)
+
+
+def test_fargate_spot_service_uses_capacity_provider_strategy():
+    template = _template(_mixed_stack({
+        'ranker': JinaLaunchConfig(launch_type=FARGATE, cpu=256, memory_limit_mib=512, spot=True),
+    }))
+
+    template.has_resource_properties('AWS::ECS::ClusterCapacityProviderAssociations', {
+        'CapacityProviders': assertions.Match.array_with(['FARGATE', 'FARGATE_SPOT']),
+    })
+    template.has_resource_properties('AWS::ECS::Service', {
+        'CapacityProviderStrategy': [{'CapacityProvider': 'FARGATE_SPOT', 'Weight': 1}],
+    })
+
+
+def test_fargate_images_are_not_pre_pulled_on_the_auto_scaling_group():
+    stack = _mixed_stack({'ranker': JinaLaunchConfig(launch_type=FARGATE, cpu=256, memory_limit_mib=512)})
+
+    assert pre_pull_images(stack) == 'jinaai/encoder:1.0'
@@ -0,0 +1,116 @@
+import argparse
+import json
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+from jina import Deployment, Flow
+
+from jina_aws.flow import JinaFlowStack
+from jina_aws.performance import JinaPerformanceConfig, validate_flow_node_configs
+from jina_aws.sagemaker.sagemaker_stack import JinaSageMakerStack
+
+
+def _parser(*dests):
+    parser = argparse.ArgumentParser()
+    for dest in dests:
+        parser.add_argument(f'--{dest.replace("_", "-")}', dest=dest)
+    return parser
+
+
+def test_apply_merges_args_and_env():
+    config = JinaPerformanceConfig(
+        uses_dynamic_batching={'/encode': {'preferred_batch_size': 32, 'timeout': 100}},
+        timeout_send=5000,
+        env={'OMP_NUM_THREADS': '4'},
+    )
+    non_defaults = {'uses': 'docker://encoder'}
+    env = config.apply('encoder', _parser('uses_dynamic_batching', 'timeout_send'), non_defaults, {'A': '1'})
+
+    assert non_defaults == {
+        'uses': 'docker://encoder',
+        'uses_dynamic_batching': {'/encode': {'preferred_batch_size': 32, 'timeout': 100}},
+        'timeout_send': 5000,
+    }
+    assert env == {'A': '1', 'OMP_NUM_THREADS': '4'}
+
+
+def test_validate_rejects_args_unknown_to_the_node():
+    with pytest.raises(ValueError, match='prefetch'):
+        JinaPerformanceConfig(prefetch=10).validate('encoder', _parser('uses_dynamic_batching'))
+
+
+@pytest.mark.parametrize('config', [
+    JinaPerformanceConfig(prefetch=-1),
+    JinaPerformanceConfig(timeout_send=0),
+    JinaPerformanceConfig(uses_dynamic_batching={'encode': {'timeout': 10}}),
+    JinaPerformanceConfig(uses_dynamic_batching={'/encode': {'batch_size': 10}}),
+    JinaPerformanceConfig(uses_dynamic_batching={'/encode': {'preferred_batch_size': 0}}),
+    JinaPerformanceConfig(env={'OMP_NUM_THREADS': 4}),
+])
+def test_validate_rejects_invalid_values(config):
+    with pytest.raises(ValueError):
+        config.validate('node', _parser('prefetch', 'timeout_send', 'uses_dynamic_batching'))
+
+
+def test_validate_flow_node_configs_rejects_unknown_nodes():
+    validate_flow_node_configs({'gateway': JinaPerformanceConfig(), 'encoder': JinaPerformanceConfig()}, ['encoder'])
+    with pytest.raises(ValueError, match='indexer'):
+        validate_flow_node_configs({'indexer': JinaPerformanceConfig()}, ['encoder'])
+
+
+def _entry_points(template):
+    return {
+        logical_id: resource['Properties']['ContainerDefinitions'][0]['EntryPoint']
+        for logical_id, resource in template.find_resources('AWS::ECS::TaskDefinition').items()
+    }
+
+
+def test_flow_stack_renders_performance_config_into_entry_point():
+    batching = {'/encode': {'preferred_batch_size': 32, 'timeout': 100}}
+    stack = JinaFlowStack(
+        core.App(), 'jina-flow',
+        jina_flow=Flow().add(name='encoder', uses='docker://encoder'),
+        performance={
+            'gateway': JinaPerformanceConfig(prefetch=10),
+            'encoder': JinaPerformanceConfig(uses_dynamic_batching=batching, env={'OMP_NUM_THREADS': '4'}),
+        },
+    )
+    entry_points = _entry_points(assertions.Template.from_stack(stack))
+
+    gateway = next(args for logical_id, args in entry_points.items() if logical_id.startswith('gateway'))
+    encoder = next(args for logical_id, args in entry_points.items() if logical_id.startswith('encoder'))
+    assert gateway[gateway.index('--prefetch') + 1] == '10'
+    assert json.loads(encoder[encoder.index('--uses-dynamic-batching') + 1]) == batching
+    assert '--prefetch' not in encoder
+
+
+def test_flow_stack_rejects_prefetch_on_executor():
+    with pytest.raises(ValueError, match='prefetch'):
+        JinaFlowStack(
+            core.App(), 'jina-flow',
+            jina_flow=Flow().add(name='encoder', uses='docker://encoder'),
+            performance={'encoder': JinaPerformanceConfig(prefetch=10)},
+        )
+
+
+def test_sagemaker_stack_maps_timeout_ready_to_startup_health_check():
+    stack = JinaSageMakerStack(
+        core.App(), 'jina-sagemaker',
+        jina_deployment=Deployment(uses='docker://encoder'),
+        performance=JinaPerformanceConfig(timeout_ready=900000),
+    )
+
+    assertions.Template.from_stack(stack).has_resource_properties('AWS::SageMaker::EndpointConfig', {
+        'ProductionVariants': [assertions.Match.object_like({'ContainerStartupHealthCheckTimeoutInSeconds': 900})],
+    })
+
+
+@pytest.mark.parametrize('timeout_ready', [-1, 30000, 3601000, 90500])
+def test_sagemaker_stack_rejects_unsupported_timeout_ready(timeout_ready):
+    with pytest.raises(ValueError, match='timeout_ready'):
+        JinaSageMakerStack(
+            core.App(), 'jina-sagemaker',
+            jina_deployment=Deployment(uses='docker://encoder'),
+            performance=JinaPerformanceConfig(timeout_ready=timeout_ready),
+        )
@@ -0,0 +1,87 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+from jina import Flow
+
+from jina_aws.flow import JinaFlowStack
+from jina_aws.rollout import JinaRolloutConfig
+
+
+def _flow(replicas=1, **kwargs):
+    return Flow(**kwargs).add(name='encoder', uses='docker://encoder', replicas=replicas) \
+        .add(name='indexer', uses='docker://indexer')
+
+
+def _template(jina_flow, **kwargs):
+    return assertions.Template.from_stack(JinaFlowStack(core.App(), 'jina-flow', jina_flow=jina_flow, **kwargs))
+
+
+def test_services_use_circuit_breaker_and_healthy_percent():
+    template = _template(_flow(), rollout=JinaRolloutConfig(min_healthy_percent=50, max_healthy_percent=150))
+
+    template.resource_count_is('AWS::ECS::Service', 3)
+    template.all_resources_properties('AWS::ECS::Service', {
+        'DeploymentConfiguration': {
+            'DeploymentCircuitBreaker': {'Enable': True, 'Rollback': True},
+            'MinimumHealthyPercent': 50,
+            'MaximumPercent': 150,
+        },
+        'HealthCheckGracePeriodSeconds': 120,
+    })
+
+
+def test_target_groups_use_deregistration_delay():
+    template = _template(_flow(), rollout=JinaRolloutConfig(deregistration_delay_seconds=15))
+
+    template.all_resources_properties('AWS::ElasticLoadBalancingV2::TargetGroup', {
+        'HealthCheckIntervalSeconds': 10,
+        'TargetGroupAttributes': assertions.Match.array_with([
+            {'Key': 'deregistration_delay.timeout_seconds', 'Value': '15'},
+        ]),
+    })
+
+
+def test_task_definitions_are_identical_across_synths():
+    first = _template(_flow()).find_resources('AWS::ECS::TaskDefinition')
+    second = _template(_flow()).find_resources('AWS::ECS::TaskDefinition')
+    # a scaling change only updates the desired count of the service
+    scaled = _template(_flow(replicas=3))
+
+    assert first == second == scaled.find_resources('AWS::ECS::TaskDefinition')
+    scaled.has_resource_properties('AWS::ECS::Service', {'ServiceName': 'encoder', 'DesiredCount': 3})
+    entry_point = first[next(k for k in first if k.startswith('encoder'))]['Properties']['ContainerDefinitions'][0][
+        'EntryPoint']
+    assert entry_point[entry_point.index('--port') + 1] == '8080'
+
+
+@pytest.mark.parametrize('config', [
+    JinaRolloutConfig(min_healthy_percent=101),
+    JinaRolloutConfig(max_healthy_percent=90),
+    JinaRolloutConfig(min_healthy_percent=100, max_healthy_percent=100),
+    JinaRolloutConfig(deregistration_delay_seconds=3601),
+    JinaRolloutConfig(stop_timeout_seconds=121),
+    JinaRolloutConfig(health_check_interval_seconds=4),
+    JinaRolloutConfig(healthy_threshold_count=3, unhealthy_threshold_count=2),
+    JinaRolloutConfig(healthy_threshold_count=1, unhealthy_threshold_count=1),
+    JinaRolloutConfig(healthy_threshold_count=11, unhealthy_threshold_count=11),
+])
+def test_validate_rejects_invalid_config(config):
+    with pytest.raises(ValueError):
+        config.validate()
+
+
+def test_http_gateway_is_pinged_over_http():
+    template = _template(_flow(protocol='http'))
+
+    gateway = template.find_resources('AWS::ECS::TaskDefinition')
+    gateway = gateway[next(k for k in gateway if k.startswith('gateway'))]['Properties']['ContainerDefinitions'][0]
+    assert gateway['HealthCheck']['Command'] == [
+        'CMD-SHELL', 'jina ping gateway http://127.0.0.1:8080 --timeout 3000 || exit 1'
+    ]
+    encoder = template.find_resources('AWS::ECS::TaskDefinition')
+    encoder = encoder[next(k for k in encoder if k.startswith('encoder'))]['Properties']['ContainerDefinitions'][0]
+    assert 'grpc://127.0.0.1:8080' in encoder['HealthCheck']['Command'][1]
+
+
+def test_validate_accepts_defaults():
+    JinaRolloutConfig().validate()
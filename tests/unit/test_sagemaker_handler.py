@@ -0,0 +1,119 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import aws_cdk as core
+import pytest
+from jina import Deployment
+
+from jina_aws.sagemaker.benchmark import StubRuntimeClient, load_handler
+from jina_aws.sagemaker.sagemaker_stack import JinaSageMakerStack
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv('ENDPOINT_NAME', 'test')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    return load_handler(StubRuntimeClient(invocation_latency_ms=0, doc_latency_ms=0))
+
+
+def test_split_batches_respects_batch_size_and_payload(handler):
+    docs = [{'text': 'a' * 10} for _ in range(5)]
+    doc_bytes = len(json.dumps(docs[0]))
+
+    assert [(offset, len(batch)) for offset, batch in handler.split_batches(docs, 2, 10 * doc_bytes)] == \
+           [(0, 2), (2, 2), (4, 1)]
+    assert [(offset, len(batch)) for offset, batch in handler.split_batches(docs, 10, 3 * doc_bytes)] == \
+           [(0, 3), (3, 2)]
+
+
+def test_bulk_returns_all_documents_in_order(handler):
+    handler.BULK_BATCH_SIZE = 3
+    docs = [{'text': f'doc {i}'} for i in range(10)]
+
+    response = handler.proxy({'path': '/bulk', 'body': json.dumps({'data': docs})}, None)
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'data': docs, 'errors': []}
+    assert handler.client.invocations == 4
+
+
+def test_bulk_reports_errors_per_document(handler):
+    handler.BULK_BATCH_SIZE = 2
+    invoke_endpoint = handler.client.invoke_endpoint
+
+    def failing_invoke_endpoint(**kwargs):
+        if json.loads(kwargs['Body'])['data'][0]['text'] == 'doc 2':
+            raise RuntimeError('model error')
+        return invoke_endpoint(**kwargs)
+
+    handler.client.invoke_endpoint = failing_invoke_endpoint
+    docs = [{'text': f'doc {i}'} for i in range(5)]
+
+    response = handler.proxy({'path': '/bulk/', 'body': json.dumps({'data': docs})}, None)
+
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 207
+    assert body['data'] == [docs[0], docs[1], None, None, docs[4]]
+    assert [error['index'] for error in body['errors']] == [2, 3]
+
+
+def test_bulk_rejects_requests_above_document_limit(handler):
+    handler.BULK_MAX_DOCUMENTS = 4
+    docs = [{'text': f'doc {i}'} for i in range(5)]
+
+    response = handler.proxy({'path': '/bulk', 'body': json.dumps({'data': docs})}, None)
+
+    assert response['statusCode'] == 413
+    assert handler.client.invocations == 0
+
+
+def test_bulk_rejects_requests_without_document_list(handler):
+    for body in ({}, {'data': 'doc'}, {'data': {'text': 'doc'}}, ['doc']):
+        response = handler.proxy({'path': '/bulk', 'body': json.dumps(body)}, None)
+
+        assert response['statusCode'] == 400
+    assert handler.client.invocations == 0
+
+
+def test_bulk_returns_finished_batches_at_deadline(handler, monkeypatch):
+    handler.BULK_BATCH_SIZE = 1
+    handler.BULK_CONCURRENCY = 1
+    handler.BULK_TIMEOUT_SECONDS = 10
+    clock = {'now': 0.0}
+    monkeypatch.setattr(handler, 'time', SimpleNamespace(monotonic=lambda: clock['now']))
+    release = threading.Event()
+    invoke_endpoint = handler.client.invoke_endpoint
+
+    def controlled_invoke_endpoint(**kwargs):
+        text = json.loads(kwargs['Body'])['data'][0]['text']
+        if text == 'doc 2':
+            release.wait()
+        response = invoke_endpoint(**kwargs)
+        if text == 'doc 1':
+            # the deadline passes while the third batch is still running
+            clock['now'] = 11.0
+        return response
+
+    handler.client.invoke_endpoint = controlled_invoke_endpoint
+    docs = [{'text': f'doc {i}'} for i in range(4)]
+
+    try:
+        response = handler.proxy({'path': '/bulk', 'body': json.dumps({'data': docs})}, None)
+    finally:
+        release.set()
+
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 207
+    assert body['data'] == [docs[0], docs[1], None, None]
+    assert [error['index'] for error in body['errors']] == [2, 3]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'bulk_batch_size': 0},
+    {'bulk_concurrency': 0},
+    {'bulk_max_documents': -1},
+])
+def test_stack_rejects_invalid_bulk_settings(kwargs):
+    with pytest.raises(ValueError, match=next(iter(kwargs))):
+        JinaSageMakerStack(core.App(), 'jina-sagemaker', jina_deployment=Deployment(uses='docker://encoder'), **kwargs)
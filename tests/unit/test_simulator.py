@@ -0,0 +1,164 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from jina import Flow
+
+from jina_aws.launch import FARGATE, JinaLaunchConfig
+from jina_aws.simulator import (
+    ExecutorProfile,
+    FlowNode,
+    FlowSimulator,
+    flow_topology,
+    load_profiles,
+)
+
+PROFILES = {
+    'encoder': {
+        't3.medium': ExecutorProfile(throughput_rps=10, p50_latency_ms=50, p99_latency_ms=100),
+        'fargate-1024': ExecutorProfile(throughput_rps=20, p50_latency_ms=20, p99_latency_ms=40),
+    },
+    'indexer': {
+        't3.medium': ExecutorProfile(throughput_rps=50, p50_latency_ms=5, p99_latency_ms=10),
+    },
+}
+
+
+def _flow(shards=1):
+    def deployment(needs, uses, replicas=1, shards=1):
+        return SimpleNamespace(needs=needs, args=SimpleNamespace(uses=uses, replicas=replicas, shards=shards))
+
+    return SimpleNamespace(gateway_args=SimpleNamespace(replicas=1), _deployment_nodes={
+        'encoder': deployment({'gateway'}, 'docker://encoder', replicas=2),
+        'indexer': deployment({'encoder'}, 'docker://indexer', shards=shards),
+        'gateway': deployment({'indexer'}, None),
+    })
+
+
+def test_flow_topology_skips_gateway_and_rejects_shards():
+    nodes = flow_topology(_flow())
+
+    assert list(nodes) == ['encoder', 'indexer']
+    assert nodes['encoder'].needs == set()
+    assert nodes['indexer'].needs == {'encoder'}
+    with pytest.raises(ValueError, match='shards'):
+        flow_topology(_flow(shards=2))
+
+
+def test_flow_topology_reads_jina_flow():
+    flow = Flow() \
+        .add(name='encoder', uses='docker://encoder', replicas=2) \
+        .add(name='ranker', uses='docker://ranker', needs='gateway') \
+        .add(name='indexer', uses='docker://indexer', needs=['encoder', 'ranker'])
+
+    nodes = flow_topology(flow, {'ranker': JinaLaunchConfig(launch_type=FARGATE)})
+
+    assert list(nodes) == ['encoder', 'ranker', 'indexer']
+    assert nodes['encoder'].needs == set()
+    assert nodes['ranker'].needs == set()
+    assert nodes['indexer'].needs == {'encoder', 'ranker'}
+    assert (nodes['encoder'].uses, nodes['encoder'].replicas) == ('docker://encoder', 2)
+    assert nodes['ranker'].launch.is_fargate
+    with pytest.raises(ValueError, match='shards'):
+        flow_topology(Flow().add(name='encoder', uses='docker://encoder', shards=2))
+
+
+def test_load_profiles_validates_profiles(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({'encoder': {'t3.medium': {'throughput_rps': 10, 'p50_latency_ms': 50,
+                                                          'p99_latency_ms': 100}}}))
+    assert load_profiles(str(path)) == {'encoder': {'t3.medium': PROFILES['encoder']['t3.medium']}}
+
+    path.write_text(json.dumps({'encoder': {'t3.medium': {'throughput_rps': 0, 'p50_latency_ms': 50,
+                                                          'p99_latency_ms': 100}}}))
+    with pytest.raises(ValueError, match='throughput_rps'):
+        load_profiles(str(path))
+
+
+@pytest.mark.parametrize('profile', [
+    ExecutorProfile(throughput_rps=0, p50_latency_ms=1, p99_latency_ms=2),
+    ExecutorProfile(throughput_rps=1, p50_latency_ms=0, p99_latency_ms=2),
+    ExecutorProfile(throughput_rps=1, p50_latency_ms=3, p99_latency_ms=2),
+])
+def test_simulator_rejects_invalid_profiles(profile):
+    with pytest.raises(ValueError):
+        FlowSimulator.from_flow(_flow(), {'encoder': {'t3.medium': profile}})
+
+
+def test_predict_bin_packs_ec2_tasks_and_finds_critical_path():
+    simulator = FlowSimulator.from_flow(_flow(), PROFILES)
+
+    prediction = simulator.predict(simulator.current_config(), offered_rps=10)
+
+    assert prediction.bottleneck == 'encoder'
+    assert prediction.throughput_rps == 20
+    assert prediction.nodes['encoder'].utilization == pytest.approx(0.5)
+    assert prediction.p99_latency_ms == pytest.approx(100 + 50 * 0.5 / 0.5 + 10 + 5 * 0.2 / 0.8)
+    # four 512 MiB tasks share one t3.medium
+    assert prediction.instances == 1
+    assert prediction.hourly_cost == pytest.approx(0.0416)
+
+
+def test_predict_costs_fargate_tasks_per_vcpu_and_gb_hour():
+    launch = {'encoder': JinaLaunchConfig(launch_type=FARGATE, cpu=1024, memory_limit_mib=2048)}
+    simulator = FlowSimulator.from_flow(_flow(), PROFILES, launch=launch)
+
+    prediction = simulator.predict({'encoder': 2, 'indexer': 1}, offered_rps=10)
+
+    assert prediction.throughput_rps == 40
+    assert prediction.instances == 1
+    assert prediction.hourly_cost == pytest.approx(0.0416 + 2 * (0.04048 + 2 * 0.004445))
+
+
+def test_predict_rejects_more_instances_than_the_auto_scaling_group():
+    launch = {'indexer': JinaLaunchConfig(memory_limit_mib=3072)}
+    simulator = FlowSimulator.from_flow(_flow(), PROFILES, launch=launch)
+
+    assert simulator.predict({'encoder': 1, 'indexer': 10}).instances == 10
+    with pytest.raises(ValueError, match='at most 10'):
+        simulator.predict({'encoder': 1, 'indexer': 11})
+
+
+def test_predict_rejects_cycles():
+    with pytest.raises(ValueError, match='cycle'):
+        FlowSimulator({'a': FlowNode('a', needs={'b'}), 'b': FlowNode('b', needs={'a'})}, PROFILES)
+
+
+def test_recommend_respects_capacity_and_writes_back_replicas():
+    flow = _flow()
+    simulator = FlowSimulator.from_flow(flow, PROFILES)
+
+    replicas = simulator.recommend(target_rps=100)
+
+    assert replicas == {'encoder': 15, 'indexer': 3}
+    assert simulator.predict(replicas, offered_rps=100).instances == 3
+    simulator.apply_recommendation(flow, replicas)
+    assert flow._deployment_nodes['encoder'].args.replicas == 15
+
+    # 72 encoder tasks do not fit on 10 instances
+    with pytest.raises(ValueError, match='at most 10'):
+        simulator.recommend(target_rps=500, max_replicas=100)
+
+
+def test_simulator_requires_priced_instance_type():
+    with pytest.raises(ValueError, match='t4.medium'):
+        FlowSimulator.from_flow(_flow(), PROFILES, instance_type='t4.medium')
+
+
+def test_apply_recommendation_rejects_other_instance_types():
+    simulator = FlowSimulator.from_flow(_flow(), {'encoder': {'c5.xlarge': PROFILES['encoder']['t3.medium']},
+                                                  'indexer': {'c5.xlarge': PROFILES['indexer']['t3.medium']}},
+                                        instance_type='c5.xlarge')
+
+    with pytest.raises(ValueError, match='t3.medium'):
+        simulator.apply_recommendation(_flow(), simulator.recommend(target_rps=10))
+
+
+def test_recommend_scales_for_latency_budget():
+    simulator = FlowSimulator.from_flow(_flow(), PROFILES)
+
+    replicas = simulator.recommend(target_rps=50, p99_latency_budget_ms=150)
+
+    assert simulator.predict(replicas, offered_rps=50).p99_latency_ms <= 150
+    with pytest.raises(ValueError, match='budget'):
+        simulator.recommend(target_rps=50, p99_latency_budget_ms=100)